@@ -0,0 +1,211 @@
+"""benchmark.py -- benchmark suite of transdate
+
+Times conversion functions, lunardate construction, arithmetic, ganzi and
+strftime over uniform and skewed distributions of dates in the whole
+supported range, plus module import and command line interface. Results
+are printed (or saved) as JSON, and can be compared against a baseline
+saved before.
+
+Usage: python bench/benchmark.py [options]
+  -o FILE      save results to FILE as JSON (default: print to stdout)
+  -c FILE      compare results with baseline FILE, exit with status 1 when
+               any benchmark is slower than the threshold
+  -t PERCENT   regression threshold in percent (default: 10)
+  -n COUNT     number of dates per distribution (default: 10000)
+  -r REPEAT    number of repetitions, best one is taken (default: 5)
+  -k NAMES     comma-separated list of benchmarks to run (default: all)
+"""
+
+import os, sys, random, time, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import transdate, importtime
+from transdate import date, timedelta, lunardate
+
+def makedates(distribution, count, seed=1881):
+    """makedates(distribution, count, seed=1881) -> list of date objects
+    Returns reproducible list of dates in the supported range. distribution
+    is either "uniform", or "skewed" where 90% of dates are drawn from
+    a few hundred hot dates (month ends, holidays and a recent week)."""
+    rng = random.Random(seed)
+    lo, hi = lunardate.min.toordinal(), lunardate.max.toordinal()
+    if distribution == 'uniform':
+        return [date.fromordinal(rng.randint(lo, hi)) for i in xrange(count)]
+    hot = [date.fromordinal(rng.randint(lo, hi)) for i in xrange(300)]
+    result = []
+    for i in xrange(count):
+        if rng.random() < 0.9: result.append(rng.choice(hot))
+        else: result.append(date.fromordinal(rng.randint(lo, hi)))
+    return result
+
+def timeit(func, args, repeat):
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        func(args)
+        elapsed = time.time() - start
+        if best is None or elapsed < best: best = elapsed
+    return best
+
+###################################################################################
+## Benchmarks
+
+# each benchmark receives a list of date objects and returns a function
+# which is timed with prepared arguments.
+
+def bench_sol2lun(dates):
+    args = [(d.year, d.month, d.day) for d in dates]
+    sol2lun = transdate.sol2lun
+    def run(args):
+        for y, m, d in args: sol2lun(y, m, d)
+    return run, args
+
+def bench_lun2sol(dates):
+    args = [transdate.sol2lun(d.year, d.month, d.day) for d in dates]
+    lun2sol = transdate.lun2sol
+    def run(args):
+        for y, m, d, l in args: lun2sol(y, m, d, l)
+    return run, args
+
+def bench_construct(dates):
+    args = [transdate.sol2lun(d.year, d.month, d.day) for d in dates]
+    def run(args):
+        for y, m, d, l in args: lunardate(y, m, d, l)
+    return run, args
+
+def bench_fromsolardate(dates):
+    fromsolardate = lunardate.fromsolardate
+    def run(args):
+        for d in args: fromsolardate(d)
+    return run, dates
+
+def bench_add(dates):
+    one = timedelta(1)
+    last = lunardate.max.toordinal()
+    args = [lunardate.fromsolardate(d) for d in dates if d.toordinal() < last]
+    def run(args):
+        for d in args: d + one
+    return run, args
+
+def bench_getganzi(dates):
+    args = [lunardate.fromsolardate(d) for d in dates]
+    def run(args):
+        for d in args: d.getganzi()
+    return run, args
+
+def bench_getganzistr(dates):
+    args = [lunardate.fromsolardate(d) for d in dates]
+    def run(args):
+        for d in args: d.getganzistr('ko')
+    return run, args
+
+def bench_strftime(dates):
+    # time.strftime doesn't accept years before 1900.
+    args = [d.timetuple() for d in dates if d.year >= 1900]
+    strftime = transdate.strftime
+    def run(args):
+        for t in args: strftime('%Y-%m-%d (%LY-%Lm-%Ld)', t)
+    return run, args
+
+def bench_lunarstrftime(dates):
+    args = [lunardate.fromsolardate(d) for d in dates]
+    def run(args):
+        for d in args: d.strftime('%LY-%Lm-%Ld')
+    return run, args
+
+BENCHMARKS = [
+    ('sol2lun', bench_sol2lun),
+    ('lun2sol', bench_lun2sol),
+    ('construct', bench_construct),
+    ('fromsolardate', bench_fromsolardate),
+    ('add', bench_add),
+    ('getganzi', bench_getganzi),
+    ('getganzistr', bench_getganzistr),
+    ('strftime', bench_strftime),
+    ('lunarstrftime', bench_lunarstrftime),
+]
+
+def bench_import(repeat):
+    return min(importtime.measure('transdate', max(repeat, 5))) / 1000
+
+def bench_cli(repeat):
+    args = [sys.executable, os.path.join(ROOT, 'transdate.py'), 'solar', '2006', '7', '20']
+    devnull = open(os.devnull, 'w')
+    best = None
+    for i in xrange(max(repeat, 5)):
+        start = time.time()
+        subprocess.call(args, stdout=devnull)
+        elapsed = time.time() - start
+        if best is None or elapsed < best: best = elapsed
+    return best
+
+###################################################################################
+## Driver
+
+def run(count=10000, repeat=5, names=None):
+    """run(count=10000, repeat=5, names=None) -> dict
+    Runs benchmarks and returns results, keyed by "name/distribution" with
+    time per call in microseconds."""
+    results = {}
+    for distribution in ('uniform', 'skewed'):
+        dates = makedates(distribution, count)
+        for name, bench in BENCHMARKS:
+            if names and name not in names: continue
+            func, args = bench(dates)
+            elapsed = timeit(func, args, repeat)
+            results['%s/%s' % (name, distribution)] = elapsed * 1e6 / len(args)
+    if not names or 'import' in names:
+        results['import'] = bench_import(repeat) * 1e6
+    if not names or 'cli' in names:
+        results['cli'] = bench_cli(repeat) * 1e6
+    return {'python': sys.version.split()[0], 'platform': sys.platform,
+            'transdate': transdate.__version__, 'count': count,
+            'unit': 'usec per call', 'results': results}
+
+def compare(current, baseline, threshold):
+    """compare(current, baseline, threshold) -> list of regressions
+    Prints comparison of two results and returns names of benchmarks slower
+    than baseline by more than threshold percent."""
+    regressions = []
+    for name in sorted(current['results']):
+        now = current['results'][name]
+        before = baseline['results'].get(name)
+        if before is None:
+            print '%-28s %12.3f' % (name, now)
+            continue
+        change = (now - before) * 100.0 / before
+        mark = ''
+        if change > threshold:
+            mark = '  REGRESSION'
+            regressions.append(name)
+        print '%-28s %12.3f %12.3f %+8.1f%%%s' % (name, before, now, change, mark)
+    return regressions
+
+def main(argv):
+    import getopt
+    try:
+        import json
+    except ImportError:
+        import simplejson as json
+    opts, args = getopt.getopt(argv, 'o:c:t:n:r:k:')
+    opts = dict(opts)
+    names = opts.get('-k') and opts['-k'].split(',')
+    current = run(int(opts.get('-n', 10000)), int(opts.get('-r', 5)), names)
+    data = json.dumps(current, indent=2, sort_keys=True)
+    if '-o' in opts:
+        f = open(opts['-o'], 'w')
+        f.write(data + '\n')
+        f.close()
+    elif '-c' not in opts:
+        print data
+    if '-c' in opts:
+        baseline = json.load(open(opts['-c']))
+        if compare(current, baseline, float(opts.get('-t', 10))):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
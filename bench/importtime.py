@@ -0,0 +1,50 @@
+"""importtime.py -- import time budget of transdate
+
+Imports transdate module in fresh interpreters and reports the median
+time in milliseconds. Exits with status 1 when the median exceeds given
+budget, so it can be run as a check after changing module-level code.
+
+Usage: python bench/importtime.py [-n runs] [-b budget_ms] [module]
+"""
+
+import os, sys, subprocess
+
+BUDGET = 5.0 # milliseconds, including the import of datetime module
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = 'import time; t = time.time(); import %s; print time.time() - t'
+
+def measure(module='transdate', runs=20):
+    """measure(module='transdate', runs=20) -> list of milliseconds
+    Returns import time of given module for each run, sorted."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    # the first run compiles the module, so it is not counted.
+    subprocess.call([sys.executable, '-c', 'import ' + module], env=env)
+    result = []
+    for i in xrange(runs):
+        output = subprocess.Popen([sys.executable, '-S', '-c', SCRIPT % module],
+                                  stdout=subprocess.PIPE, env=env).communicate()[0]
+        result.append(float(output) * 1000)
+    result.sort()
+    return result
+
+def main(argv):
+    import getopt
+    opts, args = getopt.getopt(argv, 'n:b:')
+    opts = dict(opts)
+    runs = int(opts.get('-n', 20))
+    budget = float(opts.get('-b', BUDGET))
+    module = args and args[0] or 'transdate'
+    times = measure(module, runs)
+    median = times[len(times) // 2]
+    print '%s: min %.2f ms, median %.2f ms, max %.2f ms (budget %.2f ms)' % \
+          (module, times[0], median, times[-1], budget)
+    if median > budget:
+        print 'import time budget exceeded'
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,250 @@
+"""gentables.py -- generates calendar table file of transdate
+Copyright (c) 2004-2006, Kang Seonghoon aka Tokigun.
+
+transdate.py and transdate_nounicode.py load lunisolar calendar table from
+transdate.dat, which is generated by this script from the source data
+below. The source data lists each lunar year with its leap month (0 if
+none) and the number of days of every month in order, including leap month
+right after the ordinary month of the same number. It is based on Korea
+Astronomy & Space Science Institute.
+
+Format of transdate.dat (all integers are little-endian):
+  header   - magic "TDAT", format version (uint16), first lunar year
+             (uint16), Gregorian ordinal of its first day (uint32), number
+             of years (uint16), number of months (uint16), CRC-32 of the
+             rest of file (uint32)
+  months   - uint16 * (months + 1), days from the first day to the first
+             day of each month; the last one is the end of the table
+  years    - uint16 * years, index of the first month of each year
+  leaps    - uint16 * years, leap month of each year or 0
+
+Usage: python gentables.py [output]
+       python gentables.py --check [file]
+"""
+
+import os, sys
+from transdate_tables import dumptables
+
+FIRSTDAY = 686686 # 1881.1.30 (lunar 1881.1.1)
+
+SOURCE = """\
+1881  7  29 30 29 30 29 30 30 29 30 30 29 30 29
+1882  0  29 30 29 30 29 30 29 30 30 29 30 30
+1883  0  29 29 30 29 29 30 29 30 30 30 29 30
+1884  5  30 29 29 30 29 29 30 29 30 30 29 30 30
+1885  0  30 29 29 30 29 29 30 29 30 29 30 30
+1886  0  30 29 30 29 30 29 29 30 29 30 29 30
+1887  4  30 30 29 30 29 30 29 29 30 29 30 29 30
+1888  0  30 29 30 30 29 30 29 29 30 29 30 29
+1889  0  30 29 30 30 29 30 29 30 29 30 29 30
+1890  2  29 30 29 30 29 30 30 29 30 29 30 29 30
+1891  0  29 30 29 30 29 30 29 30 30 29 30 30
+1892  6  29 29 30 29 29 30 29 30 30 29 30 30 30
+1893  0  29 29 30 29 29 30 29 30 29 30 30 30
+1894  0  29 30 29 30 29 29 30 29 30 29 30 30
+1895  5  30 29 30 29 30 29 29 30 29 30 29 30 29
+1896  0  30 30 30 29 30 29 29 30 29 30 29 30
+1897  0  29 30 30 29 30 29 30 29 30 29 30 29
+1898  3  30 29 30 29 30 30 29 30 29 30 29 30 29
+1899  0  30 29 30 29 30 29 30 30 29 30 29 30
+1900  8  29 30 29 29 30 29 30 30 29 30 30 29 30
+1901  0  29 30 29 29 30 29 30 29 30 30 30 29
+1902  0  30 29 30 29 29 30 29 30 29 30 30 30
+1903  5  29 30 29 30 29 29 30 29 29 30 30 29 30
+1904  0  30 30 29 30 29 29 30 29 29 30 30 29
+1905  0  30 30 29 30 30 29 29 30 29 30 29 30
+1906  4  29 30 30 29 30 29 30 29 30 29 30 29 30
+1907  0  29 30 29 30 29 30 30 29 30 29 30 29
+1908  0  30 29 29 30 30 29 30 29 30 30 29 30
+1909  2  29 30 29 29 30 29 30 29 30 30 30 29 30
+1910  0  29 30 29 29 30 29 30 29 30 30 30 29
+1911  6  30 29 30 29 29 30 29 29 30 30 29 30 30
+1912  0  30 29 30 29 29 30 29 29 30 30 29 30
+1913  0  30 30 29 30 29 29 30 29 29 30 29 30
+1914  5  30 30 29 30 30 29 29 30 29 30 29 29 30
+1915  0  30 29 30 30 29 30 29 30 29 30 29 30
+1916  0  29 30 29 30 29 30 30 29 30 29 30 29
+1917  2  30 29 29 30 29 30 30 29 30 30 29 30 29
+1918  0  30 29 29 30 29 30 29 30 30 30 29 30
+1919  7  29 30 29 29 30 29 30 29 30 30 29 30 30
+1920  0  29 30 29 29 30 29 29 30 30 29 30 30
+1921  0  30 29 30 29 29 30 29 29 30 29 30 30
+1922  5  30 29 30 30 29 29 30 29 29 30 29 30 30
+1923  0  29 30 30 29 30 29 30 29 30 29 29 30
+1924  0  30 29 30 29 30 30 29 30 29 30 29 29
+1925  4  30 29 30 30 29 30 29 30 30 29 30 29 30
+1926  0  29 29 30 29 30 29 30 30 29 30 30 29
+1927  0  30 29 29 30 29 30 29 30 30 29 30 30
+1928  2  29 30 29 29 30 29 29 30 30 29 30 30 30
+1929  0  29 30 29 29 30 29 29 30 29 30 30 30
+1930  6  29 30 30 29 29 30 29 29 30 29 30 30 29
+1931  0  30 30 30 29 29 30 29 29 30 29 30 29
+1932  0  30 30 30 29 30 29 30 29 29 30 29 30
+1933  5  29 30 30 29 30 30 29 30 29 30 29 29 30
+1934  0  29 30 29 30 30 29 30 30 29 30 29 30
+1935  0  29 29 30 29 30 29 30 30 29 30 30 29
+1936  3  30 29 29 30 29 30 29 30 29 30 30 30 29
+1937  0  30 29 29 30 29 29 30 29 30 30 30 29
+1938  7  30 30 29 29 30 29 29 30 29 30 30 29 30
+1939  0  30 30 29 29 30 29 29 30 29 30 29 30
+1940  0  30 30 29 30 29 30 29 29 30 29 30 29
+1941  6  30 30 29 30 30 29 30 29 29 30 29 30 29
+1942  0  30 29 30 30 29 30 30 29 30 29 29 30
+1943  0  29 30 29 30 29 30 30 29 30 30 29 30
+1944  4  29 29 30 29 30 29 30 29 30 30 29 30 30
+1945  0  29 29 30 29 29 30 29 30 30 30 29 30
+1946  0  30 29 29 30 29 29 30 29 30 30 29 30
+1947  2  30 30 29 29 30 29 29 30 29 30 29 30 30
+1948  0  30 29 30 29 30 29 29 30 29 30 29 30
+1949  7  30 30 29 30 29 30 29 29 30 29 30 29 30
+1950  0  30 29 30 30 29 30 29 29 30 29 30 29
+1951  0  30 29 30 30 29 30 29 30 29 30 29 30
+1952  5  29 30 29 30 29 30 30 29 30 29 30 29 30
+1953  0  29 30 29 29 30 30 29 30 30 29 30 30
+1954  0  29 29 30 29 29 30 29 30 30 29 30 30
+1955  3  30 29 29 30 29 29 30 29 30 29 30 30 30
+1956  0  29 30 29 30 29 29 30 29 30 29 30 30
+1957  8  30 29 30 29 30 29 29 30 29 30 29 30 30
+1958  0  29 30 30 29 30 29 29 30 29 30 29 30
+1959  0  29 30 30 29 30 29 30 29 30 29 30 29
+1960  6  30 29 30 29 30 30 29 30 29 30 29 30 29
+1961  0  30 29 30 29 30 29 30 30 29 30 29 30
+1962  0  29 30 29 29 30 29 30 30 29 30 30 29
+1963  4  30 29 30 29 29 30 29 30 29 30 30 30 29
+1964  0  30 29 30 29 29 30 29 30 29 30 30 30
+1965  0  29 30 29 30 29 29 30 29 29 30 30 30
+1966  3  29 30 30 29 30 29 29 30 29 29 30 30 29
+1967  0  30 30 29 30 30 29 29 30 29 30 29 30
+1968  7  29 30 30 29 30 29 30 29 30 29 30 29 30
+1969  0  29 30 29 30 29 30 30 29 30 29 30 29
+1970  0  30 29 29 30 30 29 30 29 30 30 29 30
+1971  5  29 30 29 29 30 29 30 29 30 30 30 29 30
+1972  0  29 30 29 29 30 29 30 29 30 30 30 29
+1973  0  30 29 30 29 29 30 29 29 30 30 30 29
+1974  4  30 30 29 30 29 29 30 29 29 30 30 29 30
+1975  0  30 30 29 30 29 29 30 29 29 30 29 30
+1976  8  30 30 29 30 29 30 29 30 29 30 29 29 30
+1977  0  30 29 30 30 29 30 29 30 29 30 29 29
+1978  0  30 30 29 30 29 30 30 29 30 29 30 29
+1979  6  30 29 29 30 29 30 30 29 30 30 29 30 29
+1980  0  30 29 29 30 29 30 29 30 30 29 30 30
+1981  0  29 30 29 29 30 29 29 30 30 29 30 30
+1982  4  30 29 30 29 29 30 29 29 30 30 29 30 30
+1983  0  30 29 30 29 29 30 29 29 30 29 30 30
+1984 10  30 29 30 30 29 29 30 29 29 30 29 30 30
+1985  0  29 30 30 29 30 29 30 29 29 30 29 30
+1986  0  29 30 30 29 30 30 29 30 29 30 29 29
+1987  6  30 29 30 30 29 30 29 30 30 29 30 29 30
+1988  0  29 29 30 29 30 29 30 30 29 30 30 29
+1989  0  30 29 29 30 29 30 29 30 30 29 30 30
+1990  5  29 30 29 29 30 29 29 30 30 29 30 30 30
+1991  0  29 30 29 29 30 29 29 30 29 30 30 30
+1992  0  29 30 30 29 29 30 29 29 30 29 30 30
+1993  3  29 30 30 29 30 29 30 29 29 30 29 30 29
+1994  0  30 30 30 29 30 29 30 29 29 30 29 30
+1995  8  29 30 30 29 30 30 29 30 29 30 29 29 30
+1996  0  29 30 29 30 30 29 30 29 30 30 29 30
+1997  0  29 29 30 29 30 29 30 30 29 30 30 29
+1998  5  30 29 29 30 29 29 30 30 29 30 30 30 29
+1999  0  30 29 29 30 29 29 30 29 30 30 30 29
+2000  0  30 30 29 29 30 29 29 30 29 30 30 29
+2001  4  30 30 30 29 29 30 29 29 30 29 30 29 30
+2002  0  30 30 29 30 29 30 29 29 30 29 30 29
+2003  0  30 30 29 30 30 29 30 29 29 30 29 30
+2004  2  29 30 29 30 30 29 30 29 30 29 30 29 30
+2005  0  29 30 29 30 29 30 30 29 30 30 29 29
+2006  7  30 29 30 29 30 29 30 29 30 30 29 30 30
+2007  0  29 29 30 29 29 30 29 30 30 30 29 30
+2008  0  30 29 29 30 29 29 30 29 30 30 29 30
+2009  5  30 30 29 29 30 29 29 30 29 30 29 30 30
+2010  0  30 29 30 29 30 29 29 30 29 30 29 30
+2011  0  30 29 30 30 29 30 29 29 30 29 30 29
+2012  3  30 29 30 30 30 29 30 29 29 30 29 30 29
+2013  0  30 29 30 30 29 30 29 30 29 30 29 30
+2014  9  29 30 29 30 29 30 29 30 30 29 30 29 30
+2015  0  29 30 29 29 30 29 30 30 30 29 30 29
+2016  0  30 29 30 29 29 30 29 30 30 29 30 30
+2017  5  29 30 29 30 29 29 30 29 30 29 30 30 30
+2018  0  29 30 29 30 29 29 30 29 30 29 30 30
+2019  0  30 29 30 29 30 29 29 30 29 30 29 30
+2020  4  30 29 30 30 29 30 29 29 30 29 30 29 30
+2021  0  29 30 30 29 30 29 30 29 30 29 30 29
+2022  0  30 29 30 29 30 30 29 30 29 30 29 30
+2023  2  29 30 29 30 29 30 29 30 30 29 30 29 30
+2024  0  29 30 29 29 30 29 30 30 29 30 30 29
+2025  6  30 29 30 29 29 30 29 30 29 30 30 30 29
+2026  0  30 29 30 29 29 30 29 30 29 30 30 30
+2027  0  29 30 29 30 29 29 30 29 29 30 30 30
+2028  5  29 30 30 29 30 29 29 30 29 29 30 30 29
+2029  0  30 30 29 30 30 29 29 30 29 29 30 30
+2030  0  29 30 29 30 30 29 30 29 30 29 30 29
+2031  3  30 29 30 29 30 29 30 30 29 30 29 30 29
+2032  0  30 29 29 30 29 30 30 29 30 30 29 30
+2033 11  29 30 29 29 30 29 30 29 30 30 30 29 30
+2034  0  29 30 29 29 30 29 30 29 30 30 30 29
+2035  0  30 29 30 29 29 30 29 29 30 30 29 30
+2036  6  30 30 29 30 29 29 30 29 29 30 30 29 30
+2037  0  30 30 29 30 29 29 30 29 29 30 29 30
+2038  0  30 30 29 30 29 30 29 30 29 29 30 29
+2039  5  30 30 29 30 30 29 30 29 30 29 30 29 29
+2040  0  30 29 30 30 29 30 30 29 30 29 30 29
+2041  0  30 29 29 30 29 30 30 29 30 30 29 30
+2042  2  29 30 29 29 30 29 30 29 30 30 29 30 30
+2043  0  29 30 29 29 30 29 29 30 30 29 30 30
+2044  7  30 29 30 29 29 30 29 29 30 29 30 30 30
+2045  0  30 29 30 29 29 30 29 29 30 29 30 30
+2046  0  30 29 30 30 29 29 30 29 29 30 29 30
+2047  5  30 29 30 30 29 30 29 30 29 29 30 29 30
+2048  0  29 30 30 29 30 30 29 30 29 30 29 29
+2049  0  30 29 30 29 30 30 29 30 30 29 30 29
+2050  3  30 29 29 30 29 30 29 30 30 29 30 30 29
+"""
+
+def parse(source=SOURCE):
+    """parse(source) -> (baseyear, monthtable, yeartable, leaptable)
+    Parses source data and returns calendar tables as lists."""
+    monthtable = [0]
+    yeartable = []
+    leaptable = []
+    baseyear = None
+    for line in source.splitlines():
+        fields = map(int, line.split())
+        if not fields: continue
+        year, leap, lengths = fields[0], fields[1], fields[2:]
+        if baseyear is None: baseyear = year
+        if year != baseyear + len(yeartable):
+            raise ValueError, "year %d is out of order" % year
+        if len(lengths) != (leap and 13 or 12) or not 0 <= leap <= 12:
+            raise ValueError, "wrong number of months in year %d" % year
+        for length in lengths:
+            if length not in (29, 30):
+                raise ValueError, "wrong length of month in year %d" % year
+        yeartable.append(len(monthtable) - 1)
+        leaptable.append(leap)
+        for length in lengths:
+            monthtable.append(monthtable[-1] + length)
+    return baseyear, monthtable, yeartable, leaptable
+
+def build(source=SOURCE, firstday=FIRSTDAY):
+    """build(source, firstday) -> string
+    Returns contents of calendar table file."""
+    baseyear, monthtable, yeartable, leaptable = parse(source)
+    return dumptables(baseyear, firstday, monthtable, yeartable, leaptable)
+
+def main(argv):
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transdate.dat')
+    if argv[:1] == ['--check']:
+        path = argv[1:] and argv[1] or default
+        if open(path, 'rb').read() != build():
+            print '%s is not up to date' % path
+            return 1
+        print '%s is up to date' % path
+        return 0
+    path = argv and argv[0] or default
+    f = open(path, 'wb')
+    f.write(build())
+    f.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
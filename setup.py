@@ -1,9 +1,21 @@
 from distutils.core import setup
+from distutils.command.install_data import install_data
 from transdate import __version__ as version, __license__ as license
 
+class install_data_with_modules(install_data):
+    # installs data files into the directory of modules, wherever it is
+    # (site-packages, dist-packages, --user, --home, --install-lib...).
+    def finalize_options(self):
+        self.set_undefined_options('install', ('install_lib', 'install_dir'))
+        install_data.finalize_options(self)
+
 setup(
     name='transdate',
-    py_modules=['transdate', 'transdate_nounicode'],
+    py_modules=['transdate', 'transdate_nounicode', 'transdate_tables',
+                'transdate_astro', 'transdate_server'],
+    # calendar table is installed next to the modules
+    data_files=[('', ['transdate.dat'])],
+    cmdclass={'install_data': install_data_with_modules},
     version=version.split()[0],
     description='Python implementation of Asian lunisolar calendar',
     author='Kang Seonghoon',
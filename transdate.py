@@ -10,9 +10,9 @@ and 2051-02-10 (lunar 2050-12-29). Since lunisolar calendar table is
 based on Korea Astronomy & Space Science Institute, it can be
 different with calendars used by other countries.
 
-In order to reduce size of bytecode, all of numeric table is stored as
-Unicode string (capable for range between 0 and 65535). If your Python
-is not compiled with Unicode, use transdate_nounicode.py instead.
+Calendar table is loaded from transdate.dat, which is generated by
+gentables.py and shared with transdate_nounicode.py. If your Python is
+not compiled with Unicode, use transdate_nounicode.py instead.
 """
 
 __author__ = 'Kang Seonghoon aka Tokigun'
@@ -21,204 +21,30 @@ __copyright__ = 'Copyright (c) 2004-2006 Kang Seonghoon aka Tokigun'
 __license__ = 'LGPL'
 
 __all__ = ['sol2lun', 'lun2sol', 'date', 'timedelta', 'solardate',
-           'lunardate', 'getganzistr', 'strftime']
+           'lunardate', 'getganzistr', 'strftime', 'usedaytable', 'dumpdaytable',
+           'sol2lun_array', 'lun2sol_array', 'iterlunardates',
+           'strftime_many', 'usecache', 'cache_info', 'cache_clear',
+           'useextendedrange', 'convertlines', 'convertfile', 'enrichcsv',
+           'yearganzi_array', 'monthganzi_array', 'dayganzi_array',
+           'getganzistr_array', 'lunaryearinfo', 'yearinfo', 'lunarvalue',
+           'pack_many', 'unpack_many', 'anniversaries', 'anniversaryindex',
+           'holidayindex', 'holidays', 'registerholidays', 'useinstrumentation',
+           'instrumentation_info', 'instrumentation_clear', 'lunar_diff',
+           'lunarrule', 'solarrule', 'ruleset']
 
 from datetime import date, timedelta
-import locale, time
+from itertools import imap, islice, izip, repeat
+import sys, time
 
 ###################################################################################
 ## Lunisolar Calendar Table
 
-_BASEYEAR = 1881
-_MINDATE = 686686 # 1881.1.30 (lunar 1881.1.1)
-_MAXDATE = 748788 # 2051.2.10 (lunar 2050.12.29)
-_DEFAULTLOCALE = locale.getdefaultlocale()[0].split('_')[0]
-try: import re; _STRFTIMEREGEXP = re.compile('(?<!%)((?:%%)*)%L(.)')
-except ImportError: _STRFTIMEREGEXP = None
-
-_MONTHTABLE = u"\0\u001D\u003B\u0058\u0076\u0093\u00B1\u00CF\u00EC\u010A\u0128\
-\u0145\u0163\u0180\u019D\u01BB\u01D8\u01F6\u0213\u0231\u024E\u026C\u028A\u02A7\
-\u02C5\u02E3\u0300\u031D\u033B\u0358\u0375\u0393\u03B0\u03CE\u03EC\u040A\u0427\
-\u0445\u0463\u0480\u049D\u04BB\u04D8\u04F5\u0513\u0530\u054E\u056C\u0589\u05A7\
-\u05C5\u05E3\u0600\u061D\u063B\u0658\u0675\u0693\u06B0\u06CE\u06EB\u0709\u0727\
-\u0745\u0762\u0780\u079D\u07BB\u07D8\u07F5\u0813\u0830\u084E\u086B\u0889\u08A7\
-\u08C5\u08E2\u0900\u091D\u093B\u0958\u0975\u0993\u09B0\u09CE\u09EB\u0A09\u0A27\
-\u0A44\u0A62\u0A80\u0A9D\u0ABB\u0AD8\u0AF5\u0B13\u0B30\u0B4E\u0B6B\u0B89\u0BA6\
-\u0BC4\u0BE2\u0BFF\u0C1D\u0C3A\u0C58\u0C75\u0C93\u0CB0\u0CCE\u0CEB\u0D09\u0D26\
-\u0D44\u0D61\u0D7F\u0D9D\u0DBA\u0DD8\u0DF5\u0E13\u0E30\u0E4E\u0E6B\u0E89\u0EA6\
-\u0EC4\u0EE1\u0EFF\u0F1C\u0F3A\u0F58\u0F75\u0F93\u0FB1\u0FCE\u0FEB\u1009\u1026\
-\u1043\u1061\u107E\u109C\u10BA\u10D7\u10F5\u1113\u1131\u114E\u116B\u1189\u11A6\
-\u11C3\u11E1\u11FE\u121C\u1239\u1257\u1275\u1293\u12B0\u12CE\u12EB\u1309\u1326\
-\u1343\u1361\u137E\u139C\u13B9\u13D7\u13F5\u1413\u1430\u144E\u146B\u1489\u14A6\
-\u14C3\u14E1\u14FE\u151C\u1539\u1557\u1574\u1592\u15B0\u15CE\u15EB\u1609\u1626\
-\u1643\u1661\u167E\u169C\u16B9\u16D7\u16F4\u1712\u1730\u174D\u176B\u1788\u17A6\
-\u17C3\u17E1\u17FE\u181C\u1839\u1857\u1874\u1892\u18AF\u18CD\u18EB\u1908\u1926\
-\u1943\u1961\u197E\u199C\u19B9\u19D7\u19F4\u1A12\u1A2F\u1A4D\u1A6A\u1A88\u1AA6\
-\u1AC3\u1AE1\u1AFE\u1B1C\u1B39\u1B57\u1B74\u1B91\u1BAF\u1BCC\u1BEA\u1C08\u1C25\
-\u1C43\u1C61\u1C7E\u1C9C\u1CB9\u1CD7\u1CF4\u1D11\u1D2F\u1D4C\u1D6A\u1D87\u1DA5\
-\u1DC3\u1DE1\u1DFE\u1E1C\u1E39\u1E57\u1E74\u1E91\u1EAF\u1ECC\u1EEA\u1F07\u1F25\
-\u1F43\u1F61\u1F7E\u1F9C\u1FB9\u1FD7\u1FF4\u2011\u202F\u204C\u2069\u2087\u20A5\
-\u20C2\u20E0\u20FE\u211C\u2139\u2157\u2174\u2191\u21AF\u21CC\u21E9\u2207\u2225\
-\u2242\u2260\u227E\u229B\u22B9\u22D7\u22F4\u2311\u232F\u234C\u236A\u2387\u23A5\
-\u23C2\u23E0\u23FE\u241B\u2439\u2456\u2474\u2491\u24AF\u24CC\u24EA\u2507\u2525\
-\u2542\u2560\u257D\u259B\u25B8\u25D6\u25F4\u2611\u262F\u264C\u266A\u2687\u26A5\
-\u26C2\u26DF\u26FD\u271B\u2738\u2756\u2773\u2791\u27AF\u27CC\u27EA\u2807\u2825\
-\u2842\u285F\u287D\u289A\u28B8\u28D5\u28F3\u2911\u292F\u294C\u296A\u2987\u29A5\
-\u29C2\u29DF\u29FD\u2A1A\u2A38\u2A55\u2A73\u2A91\u2AAF\u2ACC\u2AEA\u2B07\u2B25\
-\u2B42\u2B5F\u2B7D\u2B9A\u2BB7\u2BD5\u2BF3\u2C10\u2C2E\u2C4C\u2C6A\u2C87\u2CA5\
-\u2CC2\u2CDF\u2CFD\u2D1A\u2D37\u2D55\u2D73\u2D90\u2DAE\u2DCC\u2DEA\u2E07\u2E25\
-\u2E42\u2E5F\u2E7D\u2E9A\u2EB7\u2ED5\u2EF2\u2F10\u2F2E\u2F4C\u2F69\u2F87\u2FA5\
-\u2FC2\u2FDF\u2FFD\u301A\u3038\u3055\u3072\u3090\u30AE\u30CB\u30E9\u3107\u3124\
-\u3142\u315F\u317D\u319A\u31B8\u31D5\u31F3\u3210\u322E\u324B\u3269\u3286\u32A4\
-\u32C2\u32DF\u32FD\u331A\u3338\u3355\u3373\u3390\u33AD\u33CB\u33E8\u3406\u3424\
-\u3441\u345F\u347D\u349A\u34B8\u34D5\u34F3\u3510\u352D\u354B\u3568\u3586\u35A3\
-\u35C1\u35DF\u35FD\u361A\u3638\u3655\u3673\u3690\u36AD\u36CB\u36E8\u3706\u3723\
-\u3741\u375F\u377C\u379A\u37B8\u37D5\u37F3\u3810\u382D\u384B\u3868\u3885\u38A3\
-\u38C1\u38DE\u38FC\u391A\u3938\u3955\u3973\u3990\u39AD\u39CB\u39E8\u3A05\u3A23\
-\u3A40\u3A5E\u3A7C\u3A9A\u3AB7\u3AD5\u3AF3\u3B10\u3B2D\u3B4B\u3B68\u3B85\u3BA3\
-\u3BC0\u3BDE\u3BFC\u3C19\u3C37\u3C55\u3C72\u3C90\u3CAD\u3CCB\u3CE8\u3D06\u3D23\
-\u3D40\u3D5E\u3D7C\u3D99\u3DB7\u3DD4\u3DF2\u3E10\u3E2D\u3E4B\u3E68\u3E86\u3EA3\
-\u3EC0\u3EDE\u3EFB\u3F19\u3F37\u3F54\u3F72\u3F8F\u3FAD\u3FCB\u3FE8\u4006\u4023\
-\u4041\u405E\u407B\u4099\u40B6\u40D4\u40F1\u410F\u412D\u414A\u4168\u4186\u41A3\
-\u41C1\u41DE\u41FB\u4219\u4236\u4254\u4271\u428F\u42AD\u42CA\u42E8\u4306\u4323\
-\u4341\u435E\u437B\u4399\u43B6\u43D3\u43F1\u440F\u442C\u444A\u4468\u4486\u44A3\
-\u44C1\u44DE\u44FB\u4519\u4536\u4553\u4571\u458E\u45AC\u45CA\u45E8\u4605\u4623\
-\u4641\u465E\u467B\u4699\u46B6\u46D3\u46F1\u470E\u472C\u474A\u4767\u4785\u47A3\
-\u47C1\u47DE\u47FB\u4819\u4836\u4853\u4871\u488E\u48AC\u48C9\u48E7\u4905\u4923\
-\u4940\u495E\u497B\u4999\u49B6\u49D3\u49F1\u4A0E\u4A2C\u4A49\u4A67\u4A85\u4AA2\
-\u4AC0\u4ADE\u4AFB\u4B19\u4B36\u4B54\u4B71\u4B8E\u4BAC\u4BC9\u4BE7\u4C04\u4C22\
-\u4C40\u4C5D\u4C7B\u4C99\u4CB6\u4CD4\u4CF1\u4D0F\u4D2C\u4D49\u4D67\u4D84\u4DA2\
-\u4DBF\u4DDD\u4DFB\u4E18\u4E36\u4E54\u4E71\u4E8F\u4EAC\u4EC9\u4EE7\u4F04\u4F22\
-\u4F3F\u4F5D\u4F7A\u4F98\u4FB6\u4FD4\u4FF1\u500F\u502C\u5049\u5067\u5084\u50A1\
-\u50BF\u50DC\u50FA\u5118\u5136\u5153\u5171\u518F\u51AC\u51C9\u51E7\u5204\u5221\
-\u523F\u525C\u527A\u5298\u52B5\u52D3\u52F1\u530F\u532C\u5349\u5367\u5384\u53A1\
-\u53BF\u53DC\u53FA\u5417\u5435\u5453\u5471\u548E\u54AC\u54C9\u54E7\u5504\u5521\
-\u553F\u555C\u557A\u5597\u55B5\u55D3\u55F0\u560E\u562C\u5649\u5667\u5684\u56A1\
-\u56BF\u56DC\u56FA\u5717\u5735\u5752\u5770\u578E\u57AB\u57C9\u57E7\u5804\u5822\
-\u583F\u585C\u587A\u5897\u58B5\u58D2\u58F0\u590D\u592B\u5949\u5966\u5984\u59A2\
-\u59BF\u59DD\u59FA\u5A17\u5A35\u5A52\u5A70\u5A8D\u5AAB\u5AC8\u5AE6\u5B04\u5B21\
-\u5B3F\u5B5D\u5B7A\u5B97\u5BB5\u5BD2\u5BEF\u5C0D\u5C2A\u5C48\u5C66\u5C84\u5CA1\
-\u5CBF\u5CDD\u5CFA\u5D17\u5D35\u5D52\u5D6F\u5D8D\u5DAA\u5DC8\u5DE6\u5E03\u5E21\
-\u5E3F\u5E5D\u5E7A\u5E97\u5EB5\u5ED2\u5EEF\u5F0D\u5F2A\u5F48\u5F65\u5F83\u5FA1\
-\u5FBF\u5FDC\u5FFA\u6017\u6035\u6052\u606F\u608D\u60AA\u60C8\u60E5\u6103\u6121\
-\u613F\u615C\u617A\u6197\u61B5\u61D2\u61EF\u620D\u622A\u6248\u6265\u6283\u62A1\
-\u62BE\u62DC\u62FA\u6317\u6335\u6352\u636F\u638D\u63AA\u63C8\u63E5\u6403\u6420\
-\u643E\u645C\u6479\u6497\u64B4\u64D2\u64EF\u650D\u652A\u6548\u6565\u6583\u65A0\
-\u65BE\u65DB\u65F9\u6617\u6634\u6652\u666F\u668D\u66AA\u66C8\u66E5\u6703\u6720\
-\u673D\u675B\u6779\u6796\u67B4\u67D2\u67EF\u680D\u682B\u6848\u6865\u6883\u68A0\
-\u68BD\u68DB\u68F8\u6916\u6934\u6951\u696F\u698D\u69AB\u69C8\u69E5\u6A03\u6A20\
-\u6A3D\u6A5B\u6A78\u6A96\u6AB3\u6AD1\u6AEF\u6B0D\u6B2A\u6B48\u6B65\u6B83\u6BA0\
-\u6BBD\u6BDB\u6BF8\u6C16\u6C33\u6C51\u6C6F\u6C8D\u6CAA\u6CC8\u6CE5\u6D03\u6D20\
-\u6D3D\u6D5B\u6D78\u6D96\u6DB3\u6DD1\u6DEF\u6E0C\u6E2A\u6E48\u6E65\u6E83\u6EA0\
-\u6EBD\u6EDB\u6EF8\u6F16\u6F33\u6F51\u6F6E\u6F8C\u6FAA\u6FC7\u6FE5\u7002\u7020\
-\u703D\u705B\u7078\u7096\u70B3\u70D1\u70EE\u710C\u7129\u7147\u7165\u7182\u71A0\
-\u71BD\u71DB\u71F8\u7216\u7233\u7251\u726E\u728C\u72A9\u72C7\u72E4\u7302\u7320\
-\u733D\u735B\u7378\u7396\u73B3\u73D1\u73EE\u740B\u7429\u7446\u7464\u7482\u749F\
-\u74BD\u74DB\u74F8\u7516\u7533\u7551\u756E\u758B\u75A9\u75C6\u75E4\u7601\u761F\
-\u763D\u765B\u7678\u7696\u76B3\u76D1\u76EE\u770B\u7729\u7746\u7764\u7781\u779F\
-\u77BD\u77DB\u77F8\u7816\u7833\u7851\u786E\u788B\u78A9\u78C6\u78E3\u7901\u791F\
-\u793D\u795A\u7978\u7996\u79B3\u79D1\u79EE\u7A0B\u7A29\u7A46\u7A63\u7A81\u7A9F\
-\u7ABC\u7ADA\u7AF8\u7B15\u7B33\u7B51\u7B6E\u7B8B\u7BA9\u7BC6\u7BE4\u7C01\u7C1F\
-\u7C3C\u7C5A\u7C78\u7C95\u7CB3\u7CD0\u7CEE\u7D0B\u7D29\u7D46\u7D64\u7D81\u7D9F\
-\u7DBC\u7DDA\u7DF7\u7E15\u7E32\u7E50\u7E6E\u7E8B\u7EA9\u7EC6\u7EE4\u7F01\u7F1F\
-\u7F3C\u7F59\u7F77\u7F95\u7FB2\u7FD0\u7FED\u800B\u8029\u8046\u8064\u8081\u809F\
-\u80BC\u80D9\u80F7\u8114\u8132\u814F\u816D\u818B\u81A9\u81C6\u81E4\u8201\u821F\
-\u823C\u8259\u8277\u8294\u82B2\u82CF\u82ED\u830B\u8329\u8346\u8364\u8381\u839F\
-\u83BC\u83D9\u83F7\u8414\u8431\u844F\u846D\u848B\u84A8\u84C6\u84E4\u8501\u851F\
-\u853C\u8559\u8577\u8594\u85B1\u85CF\u85ED\u860A\u8628\u8646\u8664\u8681\u869F\
-\u86BC\u86D9\u86F7\u8714\u8731\u874F\u876C\u878A\u87A8\u87C6\u87E3\u8801\u881E\
-\u883C\u8859\u8877\u8894\u88B2\u88CF\u88EC\u890A\u8928\u8945\u8963\u8981\u899E\
-\u89BC\u89D9\u89F7\u8A14\u8A32\u8A4F\u8A6C\u8A8A\u8AA8\u8AC5\u8AE3\u8B00\u8B1E\
-\u8B3C\u8B59\u8B77\u8B94\u8BB2\u8BCF\u8BED\u8C0A\u8C27\u8C45\u8C62\u8C80\u8C9E\
-\u8CBB\u8CD9\u8CF7\u8D14\u8D32\u8D4F\u8D6D\u8D8A\u8DA7\u8DC5\u8DE2\u8E00\u8E1D\
-\u8E3B\u8E59\u8E76\u8E94\u8EB2\u8ECF\u8EED\u8F0A\u8F27\u8F45\u8F62\u8F7F\u8F9D\
-\u8FBB\u8FD8\u8FF6\u9014\u9032\u904F\u906D\u908A\u90A7\u90C5\u90E2\u90FF\u911D\
-\u913B\u9158\u9176\u9194\u91B2\u91CF\u91ED\u920A\u9227\u9245\u9262\u927F\u929D\
-\u92BA\u92D8\u92F6\u9314\u9331\u934F\u936D\u938A\u93A7\u93C5\u93E2\u93FF\u941D\
-\u943A\u9458\u9476\u9493\u94B1\u94CF\u94EC\u950A\u9527\u9545\u9562\u957F\u959D\
-\u95BA\u95D8\u95F5\u9613\u9631\u964E\u966C\u968A\u96A7\u96C5\u96E2\u9700\u971D\
-\u973A\u9758\u9775\u9793\u97B1\u97CE\u97EC\u9809\u9827\u9845\u9862\u9880\u989D\
-\u98BB\u98D8\u98F5\u9913\u9930\u994E\u996B\u9989\u99A7\u99C4\u99E2\u9A00\u9A1D\
-\u9A3B\u9A58\u9A75\u9A93\u9AB0\u9ACE\u9AEB\u9B09\u9B27\u9B44\u9B62\u9B80\u9B9D\
-\u9BBB\u9BD8\u9BF5\u9C13\u9C30\u9C4D\u9C6B\u9C89\u9CA6\u9CC4\u9CE2\u9D00\u9D1D\
-\u9D3B\u9D58\u9D75\u9D93\u9DB0\u9DCD\u9DEB\u9E08\u9E26\u9E44\u9E62\u9E7F\u9E9D\
-\u9EBB\u9ED8\u9EF5\u9F13\u9F30\u9F4D\u9F6B\u9F88\u9FA6\u9FC4\u9FE1\u9FFF\uA01D\
-\uA03A\uA058\uA075\uA093\uA0B0\uA0CD\uA0EB\uA108\uA126\uA143\uA161\uA17F\uA19D\
-\uA1BA\uA1D8\uA1F5\uA213\uA230\uA24D\uA26B\uA288\uA2A6\uA2C3\uA2E1\uA2FF\uA31C\
-\uA33A\uA358\uA375\uA393\uA3B0\uA3CE\uA3EB\uA408\uA426\uA443\uA461\uA47E\uA49C\
-\uA4BA\uA4D7\uA4F5\uA512\uA530\uA54E\uA56B\uA589\uA5A6\uA5C3\uA5E1\uA5FE\uA61C\
-\uA639\uA657\uA675\uA692\uA6B0\uA6CE\uA6EB\uA709\uA726\uA743\uA761\uA77E\uA79B\
-\uA7B9\uA7D7\uA7F4\uA812\uA830\uA84E\uA86B\uA889\uA8A6\uA8C3\uA8E1\uA8FE\uA91B\
-\uA939\uA956\uA974\uA992\uA9B0\uA9CD\uA9EB\uAA09\uAA26\uAA43\uAA61\uAA7E\uAA9B\
-\uAAB9\uAAD6\uAAF4\uAB12\uAB2F\uAB4D\uAB6B\uAB89\uABA6\uABC3\uABE1\uABFE\uAC1B\
-\uAC39\uAC56\uAC74\uAC91\uACAF\uACCD\uACEB\uAD08\uAD26\uAD43\uAD61\uAD7E\uAD9B\
-\uADB9\uADD6\uADF4\uAE11\uAE2F\uAE4D\uAE6A\uAE88\uAEA6\uAEC3\uAEE1\uAEFE\uAF1B\
-\uAF39\uAF56\uAF74\uAF91\uAFAF\uAFCC\uAFEA\uB008\uB025\uB043\uB060\uB07E\uB09B\
-\uB0B9\uB0D6\uB0F4\uB111\uB12F\uB14C\uB16A\uB187\uB1A5\uB1C3\uB1E0\uB1FE\uB21C\
-\uB239\uB256\uB274\uB291\uB2AF\uB2CC\uB2EA\uB307\uB325\uB342\uB360\uB37E\uB39B\
-\uB3B9\uB3D7\uB3F4\uB411\uB42F\uB44C\uB469\uB487\uB4A4\uB4C2\uB4E0\uB4FE\uB51B\
-\uB539\uB557\uB574\uB591\uB5AF\uB5CC\uB5E9\uB607\uB624\uB642\uB660\uB67D\uB69B\
-\uB6B9\uB6D7\uB6F4\uB711\uB72F\uB74C\uB769\uB787\uB7A4\uB7C2\uB7DF\uB7FD\uB81B\
-\uB839\uB856\uB874\uB891\uB8AF\uB8CC\uB8E9\uB907\uB924\uB942\uB95F\uB97D\uB99B\
-\uB9B8\uB9D6\uB9F4\uBA11\uBA2F\uBA4C\uBA69\uBA87\uBAA4\uBAC2\uBADF\uBAFD\uBB1A\
-\uBB38\uBB56\uBB74\uBB91\uBBAF\uBBCC\uBBE9\uBC07\uBC24\uBC42\uBC5F\uBC7D\uBC9A\
-\uBCB8\uBCD6\uBCF3\uBD11\uBD2E\uBD4C\uBD69\uBD87\uBDA4\uBDC2\uBDDF\uBDFD\uBE1A\
-\uBE38\uBE55\uBE73\uBE90\uBEAE\uBECC\uBEE9\uBF07\uBF24\uBF42\uBF5F\uBF7D\uBF9A\
-\uBFB7\uBFD5\uBFF2\uC010\uC02E\uC04C\uC069\uC087\uC0A4\uC0C2\uC0DF\uC0FD\uC11A\
-\uC137\uC155\uC172\uC190\uC1AE\uC1CB\uC1E9\uC207\uC224\uC242\uC25F\uC27D\uC29A\
-\uC2B7\uC2D5\uC2F2\uC310\uC32D\uC34B\uC369\uC387\uC3A4\uC3C2\uC3DF\uC3FD\uC41A\
-\uC437\uC455\uC472\uC490\uC4AD\uC4CB\uC4E9\uC507\uC524\uC542\uC55F\uC57D\uC59A\
-\uC5B7\uC5D5\uC5F2\uC610\uC62D\uC64B\uC669\uC686\uC6A4\uC6C2\uC6DF\uC6FD\uC71A\
-\uC737\uC755\uC772\uC790\uC7AD\uC7CB\uC7E8\uC806\uC824\uC841\uC85F\uC87C\uC89A\
-\uC8B7\uC8D5\uC8F2\uC910\uC92D\uC94B\uC968\uC986\uC9A3\uC9C1\uC9DF\uC9FC\uCA1A\
-\uCA37\uCA55\uCA72\uCA90\uCAAD\uCACB\uCAE8\uCB06\uCB23\uCB41\uCB5E\uCB7C\uCB9A\
-\uCBB7\uCBD5\uCBF2\uCC10\uCC2D\uCC4B\uCC68\uCC85\uCCA3\uCCC0\uCCDE\uCCFC\uCD19\
-\uCD37\uCD55\uCD72\uCD90\uCDAD\uCDCB\uCDE8\uCE05\uCE23\uCE40\uCE5E\uCE7B\uCE99\
-\uCEB7\uCED5\uCEF2\uCF10\uCF2D\uCF4B\uCF68\uCF85\uCFA3\uCFC0\uCFDE\uCFFB\uD019\
-\uD037\uD055\uD072\uD090\uD0AD\uD0CB\uD0E8\uD105\uD123\uD140\uD15D\uD17B\uD199\
-\uD1B7\uD1D4\uD1F2\uD210\uD22D\uD24B\uD268\uD285\uD2A3\uD2C0\uD2DD\uD2FB\uD319\
-\uD336\uD354\uD372\uD38F\uD3AD\uD3CB\uD3E8\uD405\uD423\uD440\uD45D\uD47B\uD499\
-\uD4B6\uD4D4\uD4F1\uD50F\uD52D\uD54A\uD568\uD585\uD5A3\uD5C0\uD5DE\uD5FB\uD619\
-\uD636\uD654\uD671\uD68F\uD6AC\uD6CA\uD6E8\uD705\uD723\uD740\uD75E\uD77B\uD799\
-\uD7B6\uD7D3\uD7F1\uD80E\uD82C\uD84A\uD867\uD885\uD8A3\uD8C0\uD8DE\uD8FB\uD919\
-\uD936\uD953\uD971\uD98E\uD9AC\uD9C9\uD9E7\uDA05\uDA23\uDA40\uDA5E\uDA7B\uDA99\
-\uDAB6\uDAD3\uDAF1\uDB0E\uDB2C\uDB49\uDB67\uDB85\uDBA3\uDBC0\uDBDE\uDBFB\uDC19\
-\uDC36\uDC53\uDC71\uDC8E\uDCAB\uDCC9\uDCE7\uDD04\uDD22\uDD40\uDD5E\uDD7B\uDD99\
-\uDDB6\uDDD3\uDDF1\uDE0E\uDE2B\uDE49\uDE67\uDE84\uDEA2\uDEC0\uDEDE\uDEFB\uDF19\
-\uDF36\uDF53\uDF71\uDF8E\uDFAB\uDFC9\uDFE6\uE004\uE022\uE040\uE05D\uE07B\uE098\
-\uE0B6\uE0D3\uE0F1\uE10E\uE12B\uE149\uE166\uE184\uE1A2\uE1BF\uE1DD\uE1FB\uE218\
-\uE236\uE253\uE271\uE28E\uE2AC\uE2C9\uE2E6\uE304\uE321\uE33F\uE35D\uE37A\uE398\
-\uE3B6\uE3D3\uE3F1\uE40E\uE42C\uE449\uE467\uE484\uE4A1\uE4BF\uE4DC\uE4FA\uE518\
-\uE535\uE553\uE571\uE58E\uE5AC\uE5C9\uE5E7\uE604\uE621\uE63F\uE65C\uE67A\uE697\
-\uE6B5\uE6D3\uE6F0\uE70E\uE72C\uE749\uE767\uE784\uE7A1\uE7BF\uE7DC\uE7F9\uE817\
-\uE835\uE852\uE870\uE88E\uE8AC\uE8C9\uE8E7\uE904\uE921\uE93F\uE95C\uE979\uE997\
-\uE9B4\uE9D2\uE9F0\uEA0E\uEA2C\uEA49\uEA67\uEA84\uEAA1\uEABF\uEADC\uEAF9\uEB17\
-\uEB34\uEB52\uEB70\uEB8E\uEBAB\uEBC9\uEBE7\uEC04\uEC21\uEC3F\uEC5C\uEC79\uEC97\
-\uECB4\uECD2\uECF0\uED0D\uED2B\uED49\uED66\uED84\uEDA1\uEDBF\uEDDC\uEDF9\uEE17\
-\uEE34\uEE52\uEE6F\uEE8D\uEEAB\uEEC8\uEEE6\uEF04\uEF21\uEF3F\uEF5C\uEF7A\uEF97\
-\uEFB4\uEFD2\uEFEF\uF00D\uF02A\uF048\uF066\uF083\uF0A1\uF0BF\uF0DC\uF0FA\uF117\
-\uF135\uF152\uF16F\uF18D\uF1AA\uF1C8\uF1E5\uF203\uF221\uF23E\uF25C\uF27A\uF297"
-
-_YEARTABLE = u"\00\u000D\u0019\u0025\u0032\u003E\u004A\u0057\u0063\u006F\u007C\
-\u0088\u0095\u00A1\u00AD\u00BA\u00C6\u00D2\u00DF\u00EB\u00F8\u0104\u0110\u011D\
-\u0129\u0135\u0142\u014E\u015A\u0167\u0173\u0180\u018C\u0198\u01A5\u01B1\u01BD\
-\u01CA\u01D6\u01E3\u01EF\u01FB\u0208\u0214\u0220\u022D\u0239\u0245\u0252\u025E\
-\u026B\u0277\u0283\u0290\u029C\u02A8\u02B5\u02C1\u02CE\u02DA\u02E6\u02F3\u02FF\
-\u030B\u0318\u0324\u0330\u033D\u0349\u0356\u0362\u036E\u037B\u0387\u0393\u03A0\
-\u03AC\u03B9\u03C5\u03D1\u03DE\u03EA\u03F6\u0403\u040F\u041B\u0428\u0434\u0441\
-\u044D\u0459\u0466\u0472\u047E\u048B\u0497\u04A4\u04B0\u04BC\u04C9\u04D5\u04E1\
-\u04EE\u04FA\u0507\u0513\u051F\u052C\u0538\u0544\u0551\u055D\u0569\u0576\u0582\
-\u058F\u059B\u05A7\u05B4\u05C0\u05CC\u05D9\u05E5\u05F1\u05FE\u060A\u0617\u0623\
-\u062F\u063C\u0648\u0654\u0661\u066D\u067A\u0686\u0692\u069F\u06AB\u06B7\u06C4\
-\u06D0\u06DC\u06E9\u06F5\u0702\u070E\u071A\u0727\u0733\u073F\u074C\u0758\u0765\
-\u0771\u077D\u078A\u0796\u07A2\u07AF\u07BB\u07C7\u07D4\u07E0\u07ED\u07F9\u0805\
-\u0812\u081E\u082A"
-
-_LEAPTABLE = "\7\0\0\5\0\0\4\0\0\2\0\6\0\0\5\0\0\3\0\10\0\0\5\0\0\4\0\0\2\0\6\
-\0\0\5\0\0\2\0\7\0\0\5\0\0\4\0\0\2\0\6\0\0\5\0\0\3\0\7\0\0\6\0\0\4\0\0\2\0\7\0\
-\0\5\0\0\3\0\10\0\0\6\0\0\4\0\0\3\0\7\0\0\5\0\0\4\0\10\0\0\6\0\0\4\0\12\0\0\6\
-\0\0\5\0\0\3\0\10\0\0\5\0\0\4\0\0\2\0\7\0\0\5\0\0\3\0\11\0\0\5\0\0\4\0\0\2\0\6\
-\0\0\5\0\0\3\0\13\0\0\6\0\0\5\0\0\2\0\7\0\0\5\0\0\3"
+from transdate_tables import loadtables as _loadtables
+
+_BASEYEAR, _MINDATE, _MONTHTABLE, _YEARTABLE, _LEAPTABLE = _loadtables()
+_MAXDATE = _MINDATE + _MONTHTABLE[-1] - 1
+_DEFAULTLOCALE = None # determined at the first use
+_GANZITABLE = {} # locale -> list of 60 ganzi strings, built at the first use
 
 _GANZIMAP = {
     'ko': u'\uac11\uc744\ubcd1\uc815\ubb34\uae30\uacbd\uc2e0\uc784\uacc4\uc790'
@@ -236,51 +62,169 @@ def _bisect(a, x):
     lo = 0; hi = len(a)
     while lo < hi:
         mid = (lo + hi) // 2
-        if x < ord(a[mid]): hi = mid
+        if x < a[mid]: hi = mid
         else: lo = mid + 1
     return lo - 1
 
-def sol2lun(year, month, day, leap=False):
-    """sol2lun(year, month, day, leap=False) -> (year, month, day, leap)
-    Returns corresponding date in lunar calendar. leap will be ignored."""
-    days = date(year, month, day).toordinal()
-    if not _MINDATE <= days <= _MAXDATE:
-        raise ValueError, "year is out of range"
-    days -= _MINDATE
-    month = _bisect(_MONTHTABLE, days)
-    year = _bisect(_YEARTABLE, month)
-    month, day = month - ord(_YEARTABLE[year]) + 1, days - ord(_MONTHTABLE[month]) + 1
-    if (ord(_LEAPTABLE[year]) or 13) < month:
-        month -= 1
-        leap = (ord(_LEAPTABLE[year]) == month)
-    else:
-        leap = False
-    return (year + _BASEYEAR, month, day, leap)
+def _toordinal(d):
+    # returns Gregorian ordinal of date object (including lunardate and
+    # lunarvalue), or d itself if it is already an ordinal.
+    if isinstance(d, (date, lunarvalue)): return d.toordinal()
+    return d
 
-def lun2sol(year, month, day, leap=False):
-    """lun2sol(year, month, day, leap=False) -> (year, month, day, leap)
-    Returns corresponding date in solar calendar."""
+def _monthindex(year, month, leap=False):
+    # returns index of given lunar month in _MONTHTABLE, validating it.
     year -= _BASEYEAR
     if not 0 <= year < len(_YEARTABLE):
         raise ValueError, "year is out of range"
     if not 1 <= month <= 12:
         raise ValueError, "wrong month"
-    if leap and ord(_LEAPTABLE[year]) != month:
+    if leap and _LEAPTABLE[year] != month:
         raise ValueError, "wrong leap month"
-    months = ord(_YEARTABLE[year]) + month - 1
-    if leap or (ord(_LEAPTABLE[year]) or 13) < month:
+    months = _YEARTABLE[year] + month - 1
+    if leap or (_LEAPTABLE[year] or 13) < month:
         months += 1
-    days = ord(_MONTHTABLE[months]) + day - 1
-    if day < 1 or days >= ord(_MONTHTABLE[months + 1]):
+    return months
+
+def _monthfields(months):
+    # returns (year, month, leap) tuple of given index in _MONTHTABLE.
+    year = _bisect(_YEARTABLE, months)
+    month = months - _YEARTABLE[year] + 1
+    if (_LEAPTABLE[year] or 13) < month:
+        month -= 1
+        return (year + _BASEYEAR, month, _LEAPTABLE[year] == month)
+    return (year + _BASEYEAR, month, False)
+
+def _monthday(months, day, clamp=False):
+    # returns (ordinal, day) of given day in given index of _MONTHTABLE.
+    # day is replaced with the last day of the month if clamp is true.
+    if not 0 <= months < len(_MONTHTABLE) - 1:
+        raise ValueError, "year is out of range"
+    start = _MONTHTABLE[months]
+    if day < 1 or start + day > _MONTHTABLE[months + 1]:
+        if not clamp or day < 1:
+            raise ValueError, "wrong day"
+        day = _MONTHTABLE[months + 1] - start
+    return (start + day - 1 + _MINDATE, day)
+
+def _ord2lun(days):
+    # converts Gregorian ordinal to (year, month, day, leap) tuple.
+    if not _MINDATE <= days <= _MAXDATE:
+        if _EXTENDED is not None: return _EXTENDED.ord2lun(days)
+        raise ValueError, "year is out of range"
+    days -= _MINDATE
+    if _USEDAYTABLE:
+        packed = (_DAYTABLE or _builddaytable())[days]
+        return (_BASEYEAR + (packed >> 10), (packed >> 6) & 15, packed & 31,
+                (packed & 32) == 32)
+    months = _bisect(_MONTHTABLE, days)
+    year, month, leap = _monthfields(months)
+    return (year, month, days - _MONTHTABLE[months] + 1, leap)
+
+def sol2lun(year, month, day, leap=False):
+    """sol2lun(year, month, day, leap=False) -> (year, month, day, leap)
+    Returns corresponding date in lunar calendar. leap will be ignored."""
+    return _ord2lun(date(year, month, day).toordinal())
+
+def _lun2ord(year, month, day, leap=False):
+    # converts lunar date to Gregorian ordinal, validating given date.
+    if _EXTENDED is not None and not 0 <= year - _BASEYEAR < len(_YEARTABLE):
+        return _EXTENDED.lun2ord(year, month, day, leap)
+    months = _monthindex(year, month, leap)
+    days = _MONTHTABLE[months] + day - 1
+    if day < 1 or days >= _MONTHTABLE[months + 1]:
         raise ValueError, "wrong day"
-    return date.fromordinal(days + _MINDATE).timetuple()[:3] + (False,)
+    return days + _MINDATE
+
+def lun2sol(year, month, day, leap=False):
+    """lun2sol(year, month, day, leap=False) -> (year, month, day, leap)
+    Returns corresponding date in solar calendar."""
+    solar = date.fromordinal(_lun2ord(year, month, day, leap))
+    return (solar.year, solar.month, solar.day, False)
+
+def _getdefaultlocale():
+    # the locale module is not imported until ganzi strings are requested.
+    # falls back to Korean if locale is unknown or unsupported.
+    global _DEFAULTLOCALE
+    import locale
+    try: language = (locale.getdefaultlocale()[0] or '').split('_')[0]
+    except ValueError: language = ''
+    if language not in _GANZIMAP: language = 'ko'
+    _DEFAULTLOCALE = language
+    return language
 
 def getganzistr(index, locale=None):
     """getganzistr(index, locale=None) -> unicode string
     Returns corresponding unicode string of ganzi.
     locale can be "ko", "ja", "zh". Uses default locale when locale is ignored."""
-    locale = locale or _DEFAULTLOCALE
-    return _GANZIMAP[locale][index%10] + _GANZIMAP[locale][10+index%12]
+    locale = locale or _DEFAULTLOCALE or _getdefaultlocale()
+    try: return _GANZITABLE[locale][index % 60]
+    except KeyError: return _ganzitable(locale)[index % 60]
+
+def _ganzitable(locale):
+    # returns list of all ganzi strings of given locale.
+    try:
+        return _GANZITABLE[locale]
+    except KeyError:
+        chars = _GANZIMAP[locale]
+        table = [chars[i % 10] + chars[10 + i % 12] for i in xrange(60)]
+        _GANZITABLE[locale] = table
+        return table
+
+_STRFTIMECACHE = {}
+_MAXSTRFTIMECACHE = 100
+
+_LUNARCODES = {
+    'Y': lambda lunar, days: '%04d' % lunar[0],
+    'm': lambda lunar, days: '%02d' % lunar[1],
+    'd': lambda lunar, days: '%02d' % lunar[2],
+    'y': lambda lunar, days: '%02d' % (lunar[0] % 100),
+    'C': lambda lunar, days: '%02d' % (lunar[0] // 100),
+    'F': lambda lunar, days: '%04d-%02d-%02d' % lunar[:3],
+    'e': lambda lunar, days: '%2d' % lunar[2],
+    'l': lambda lunar, days: lunar[3] and '1' or '0',
+    'j': lambda lunar, days: '%03d' % (days - _lun2ord(lunar[0], 1, 1) + 1),
+}
+
+def _compilestrftime(format):
+    # returns (template, codes, hassolar) tuple for given strftime format.
+    # template % (code(lunar, days) for each codes) gives a format for
+    # time.strftime, or the result itself if hassolar is false.
+    try:
+        return _STRFTIMECACHE[format]
+    except KeyError:
+        pass
+    tokens = []
+    hassolar = False
+    pos = 0
+    while True:
+        next = format.find('%', pos)
+        if next < 0:
+            tokens.append(format[pos:])
+            break
+        tokens.append(format[pos:next])
+        if format[next+1:next+2] == 'L' and next + 2 < len(format):
+            tokens.append(_LUNARCODES.get(format[next+2], lambda lunar, days: ''))
+            pos = next + 3
+        else:
+            token = format[next:next+2]
+            if token != '%%': hassolar = True
+            tokens.append(token)
+            pos = next + 2
+    codes = tuple([token for token in tokens if callable(token)])
+    if not codes:
+        result = (format, (), True)
+    else:
+        template = []
+        for token in tokens:
+            if callable(token): template.append('%s')
+            elif token == '%%' and not hassolar: template.append('%%')
+            else: template.append(token.replace('%', '%%'))
+        result = (''.join(template), codes, hassolar)
+    if len(_STRFTIMECACHE) >= _MAXSTRFTIMECACHE:
+        _STRFTIMECACHE.clear()
+    _STRFTIMECACHE[format] = result
+    return result
 
 def strftime(format, t=None):
     """strftime(format, t=None) -> string
@@ -299,17 +243,421 @@ def strftime(format, t=None):
       %LY - lunar year with century as a decimal number
     """
     if t is None: t = time.localtime()
-    if _STRFTIMEREGEXP is not None:
-        lt = sol2lun(*t[:3])
-        lord = date(t[0], t[1], t[2]).toordinal() - _MINDATE
-        ldoy = lord - ord(_MONTHTABLE[ord(_YEARTABLE[lt[0] - _BASEYEAR])]) + 1
-        lmap = {'Y': '%04d' % lt[0], 'm': '%02d' % lt[1], 'd': '%02d' % lt[2],
-                'y': '%02d' % (lt[0] % 100), 'C': '%02d' % (lt[0] // 100),
-                'F': '%04d-%02d-%02d' % lt[:3], 'e': str(lt[2]),
-                'l': '%d' % lt[3], 'j': '%03d' % ldoy}
-        format = _STRFTIMEREGEXP.sub(lambda m: '%' * (len(m.group(1)) / 2) +
-                                               lmap.get(m.group(2), ''), format)
-    return time.strftime(format, t)
+    template, codes, hassolar = _compilestrftime(format)
+    if codes:
+        days = date(t[0], t[1], t[2]).toordinal()
+        lunar = _ord2lun(days)
+        template %= tuple([code(lunar, days) for code in codes])
+    if hassolar: return time.strftime(template, t)
+    return template
+
+###################################################################################
+## Conversion Cache
+
+try: from thread import allocate_lock
+except ImportError: from dummy_thread import allocate_lock
+
+class _lrucache(object):
+    # thread-safe mapping of recent results, discarding least recently used
+    # one when full. links form circular doubly linked list of
+    # [prev, next, key, result] ordered by use, starting from self.root.
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = allocate_lock()
+        self.clear()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.map = {}
+            self.root = root = []
+            root[:] = [root, root, None, None]
+            self.hits = self.misses = 0
+        finally:
+            self.lock.release()
+
+    def get(self, key, func, *args):
+        lock = self.lock
+        lock.acquire()
+        try:
+            link = self.map.get(key)
+            if link is not None:
+                prev, next, _, result = link
+                prev[1] = next
+                next[0] = prev
+                root = self.root
+                last = root[0]
+                last[1] = root[0] = link
+                link[0] = last
+                link[1] = root
+                self.hits += 1
+                return result
+            self.misses += 1
+        finally:
+            lock.release()
+        result = func(*args)
+        lock.acquire()
+        try:
+            if key not in self.map:
+                root = self.root
+                if len(self.map) >= self.maxsize:
+                    oldest = root[1]
+                    root[1] = oldest[1]
+                    oldest[1][0] = root
+                    del self.map[oldest[2]]
+                last = root[0]
+                last[1] = root[0] = self.map[key] = [last, root, key, result]
+        finally:
+            lock.release()
+        return result
+
+    def info(self):
+        from sys import getsizeof
+        self.lock.acquire()
+        try:
+            memory = getsizeof(self.map)
+            for link in self.map.itervalues():
+                memory += getsizeof(link) + getsizeof(link[2]) + getsizeof(link[3])
+            return {'hits': self.hits, 'misses': self.misses, 'maxsize': self.maxsize,
+                    'currsize': len(self.map), 'memory': memory}
+        finally:
+            self.lock.release()
+
+_CACHE = None
+_UNCACHED = (_ord2lun, _lun2ord)
+
+def usecache(maxsize=1024):
+    """usecache(maxsize=1024)
+    Enables cache of recent conversions, which is used by sol2lun, lun2sol,
+    lunardate constructors and all functions depending on them. At most
+    maxsize results are kept, and least recently used one is discarded
+    first. maxsize of 0 or None disables the cache. Previous cache is
+    always discarded."""
+    global _CACHE, _ord2lun, _lun2ord
+    ord2lun, lun2ord = _UNCACHED
+    if not maxsize:
+        _CACHE = None
+        _ord2lun, _lun2ord = ord2lun, lun2ord
+        return
+    cache = _CACHE = _lrucache(maxsize)
+    def cachedord2lun(days):
+        return cache.get(days, ord2lun, days)
+    def cachedlun2ord(year, month, day, leap=False):
+        return cache.get((year, month, day, leap), lun2ord, year, month, day, leap)
+    _ord2lun, _lun2ord = cachedord2lun, cachedlun2ord
+
+def cache_info():
+    """cache_info() -> dict
+    Returns statistics of conversion cache enabled by usecache, as a dict
+    with the following keys: hits, misses, maxsize, currsize (number of
+    cached results) and memory (estimated memory usage in bytes)."""
+    if _CACHE is None:
+        return {'hits': 0, 'misses': 0, 'maxsize': 0, 'currsize': 0, 'memory': 0}
+    return _CACHE.info()
+
+def cache_clear():
+    """cache_clear()
+    Clears conversion cache and its statistics."""
+    if _CACHE is not None: _CACHE.clear()
+
+###################################################################################
+## Direct-index Lookup Table
+
+# packed entry is (year - _BASEYEAR) << 10 | month << 6 | leap << 5 | day.
+_USEDAYTABLE = False
+_DAYTABLE = None
+
+def _builddaytable():
+    global _DAYTABLE
+    from array import array
+    table = array('i')
+    nyears = len(_YEARTABLE)
+    for year in xrange(nyears):
+        leapmonth = _LEAPTABLE[year]
+        start = _YEARTABLE[year]
+        if year + 1 < nyears: end = _YEARTABLE[year + 1]
+        else: end = len(_MONTHTABLE) - 1
+        for months in xrange(start, end):
+            month = months - start + 1
+            leap = 0
+            if (leapmonth or 13) < month:
+                month -= 1
+                if leapmonth == month: leap = 32
+            packed = year << 10 | month << 6 | leap
+            ndays = _MONTHTABLE[months + 1] - _MONTHTABLE[months]
+            table.extend(xrange(packed + 1, packed + ndays + 1))
+    _DAYTABLE = table
+    return table
+
+def usedaytable(flag=True, data=None):
+    """usedaytable(flag=True, data=None)
+    Enables (or disables when flag is false) direct-index lookup table,
+    which is used by sol2lun and lunardate.fromsolardate instead of binary
+    search. The table has one entry per day (about 62,000 entries) and is
+    built on first use, or loaded from data if it is given. data should be
+    a string returned by dumpdaytable."""
+    global _USEDAYTABLE, _DAYTABLE
+    if data is not None:
+        from array import array
+        table = array('i')
+        if len(data) != (_MAXDATE - _MINDATE + 1) * table.itemsize:
+            raise ValueError, "wrong size of day table"
+        table.fromstring(data)
+        _DAYTABLE = table
+    _USEDAYTABLE = bool(flag)
+
+def dumpdaytable():
+    """dumpdaytable() -> string
+    Returns direct-index lookup table as a string, which can be given to
+    usedaytable later. The string depends on byte order and size of C int
+    of current platform."""
+    return (_DAYTABLE or _builddaytable()).tostring()
+
+###################################################################################
+## Extended Range
+
+_EXTENDED = None # transdate_astro module if enabled
+
+def useextendedrange(flag=True, cachedir=None):
+    """useextendedrange(flag=True, cachedir=None)
+    Enables (or disables when flag is false) conversion of dates outside of
+    the calendar table (lunar 1881 to 2050), up to lunar 1000 to 2999. The
+    calendar of extended range is computed from astronomical new moons and
+    solar terms a century at a time, and saved in cachedir (default is
+    TRANSDATE_CACHE environment variable or ~/.transdate) so that other
+    processes can reuse it. Computed calendar is an approximation, and can
+    differ from historical one by a day. Only sol2lun, lun2sol, strftime and
+    lunardate constructors and arithmetic use the extended range."""
+    global _EXTENDED
+    if flag:
+        import transdate_astro
+        if cachedir is not None: transdate_astro.setcachedir(cachedir)
+        _EXTENDED = transdate_astro
+    else:
+        _EXTENDED = None
+
+###################################################################################
+## Instrumentation
+
+# names of instrumented entry points; the others are attributes of lunardate.
+_INSTRUMENTEDFUNCS = ('sol2lun', 'lun2sol', 'strftime', 'getganzistr')
+_INSTRUMENTEDMETHODS = ('__new__', 'fromsolardate', 'strftime', 'getganzistr')
+_ORIGINALS = None # original functions while instrumentation is enabled
+_COUNTERS = {} # name -> [calls, out of range errors, other errors, seconds]
+_COUNTERSLOCK = allocate_lock()
+_CALLBACK = None
+
+def _instrument(name, func):
+    # returns func wrapped for counting calls, errors and time.
+    clock = time.time
+    def wrapper(*args, **kwargs):
+        error = None
+        started = clock()
+        try:
+            try:
+                return func(*args, **kwargs)
+            except ValueError, e:
+                if str(e) == 'year is out of range': error = 'outofrange'
+                else: error = 'invalid'
+                raise
+        finally:
+            elapsed = clock() - started
+            _COUNTERSLOCK.acquire()
+            try:
+                counters = _COUNTERS.setdefault(name, [0, 0, 0, 0.0])
+                counters[0] += 1
+                if error == 'outofrange': counters[1] += 1
+                elif error: counters[2] += 1
+                counters[3] += elapsed
+            finally:
+                _COUNTERSLOCK.release()
+            if _CALLBACK is not None: _CALLBACK(name, elapsed, error)
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+def useinstrumentation(flag=True, callback=None):
+    """useinstrumentation(flag=True, callback=None)
+    Enables (or disables when flag is false) counting calls, errors and time
+    of sol2lun, lun2sol, strftime, getganzistr, lunardate constructor,
+    lunardate.fromsolardate, lunardate.strftime and lunardate.getganzistr.
+    Counters are returned by instrumentation_info.
+    If callback is given, callback(name, seconds, error) is called after
+    each call, where error is None, "outofrange" or "invalid".
+
+    Entry points are replaced with wrappers while enabled, so disabled
+    instrumentation has no overhead at all. Note that functions imported
+    by "from transdate import ..." before enabling are not counted."""
+    global _ORIGINALS, _CALLBACK
+    setclassattr = type.__setattr__ # bypasses typeproxy
+    if _ORIGINALS is not None: # restores original functions first
+        for name in _INSTRUMENTEDFUNCS:
+            globals()[name] = _ORIGINALS[name]
+        for name in _INSTRUMENTEDMETHODS:
+            setclassattr(lunardate, name, _ORIGINALS[name])
+        _ORIGINALS = None
+    _CALLBACK = callback
+    if not flag: return
+    _ORIGINALS = {}
+    for name in _INSTRUMENTEDFUNCS:
+        func = _ORIGINALS[name] = globals()[name]
+        globals()[name] = _instrument(name, func)
+    for name in _INSTRUMENTEDMETHODS:
+        method = _ORIGINALS[name] = lunardate.__dict__[name]
+        if isinstance(method, (staticmethod, classmethod)):
+            # both staticmethod (__new__) and classmethod objects are rewrapped
+            func = method.__get__(None, lunardate)
+            if isinstance(method, classmethod):
+                func = func.im_func
+            wrapper = _instrument('lunardate.' + name, func)
+            setclassattr(lunardate, name, method.__class__(wrapper))
+        else:
+            setclassattr(lunardate, name, _instrument('lunardate.' + name, method))
+
+def instrumentation_info():
+    """instrumentation_info() -> dict
+    Returns a snapshot of counters, a dict from the name of entry point to
+    a dict with the following keys: calls, outofrange (number of "year is
+    out of range" errors), invalid (number of other ValueErrors), and time
+    (cumulative seconds). Entry points not called yet are omitted."""
+    _COUNTERSLOCK.acquire()
+    try:
+        return dict([(name, {'calls': calls, 'outofrange': outofrange,
+                             'invalid': invalid, 'time': seconds})
+                     for name, (calls, outofrange, invalid, seconds)
+                     in _COUNTERS.iteritems()])
+    finally:
+        _COUNTERSLOCK.release()
+
+def instrumentation_clear():
+    """instrumentation_clear()
+    Resets counters of instrumentation."""
+    _COUNTERSLOCK.acquire()
+    try: _COUNTERS.clear()
+    finally: _COUNTERSLOCK.release()
+
+###################################################################################
+## Array Functions (requires NumPy)
+
+_EPOCHORDINAL = 719163 # 1970.1.1, origin of numpy.datetime64
+_NPTABLES = None
+
+def _getnptables():
+    global _NPTABLES
+    if _NPTABLES is None:
+        import numpy
+        _NPTABLES = (numpy,
+                     numpy.array(_MONTHTABLE, numpy.int64),
+                     numpy.array(_YEARTABLE, numpy.int64),
+                     numpy.array(_LEAPTABLE, numpy.int64),
+                     numpy.dtype([('year', numpy.int16), ('month', numpy.int8),
+                                  ('day', numpy.int8), ('leap', numpy.bool_)]))
+    return _NPTABLES
+
+def sol2lun_array(dates):
+    """sol2lun_array(dates) -> (result, mask)
+    Array version of sol2lun. dates should be an array of Gregorian ordinals
+    or numpy.datetime64 values. Returns structured array with year, month,
+    day and leap fields, and boolean array which is true for dates out of
+    range (the corresponding elements of result are zero)."""
+    numpy, monthtable, yeartable, leaptable, dtype = _getnptables()
+    dates = numpy.asarray(dates)
+    if dates.dtype.kind == 'M':
+        days = dates.astype('datetime64[D]').astype(numpy.int64) + \
+               (_EPOCHORDINAL - _MINDATE)
+    else:
+        days = dates.astype(numpy.int64) - _MINDATE
+    mask = (days < 0) | (days > _MAXDATE - _MINDATE)
+    days = numpy.where(mask, 0, days)
+    months = monthtable.searchsorted(days, 'right') - 1
+    years = yeartable.searchsorted(months, 'right') - 1
+    month = months - yeartable[years] + 1
+    leapmonth = leaptable[years]
+    afterleap = (leapmonth != 0) & (leapmonth < month)
+    month -= afterleap
+    result = numpy.empty(days.shape, dtype)
+    result['year'] = years + _BASEYEAR
+    result['month'] = month
+    result['day'] = days - monthtable[months] + 1
+    result['leap'] = afterleap & (leapmonth == month)
+    result[mask] = 0
+    return result, mask
+
+def lun2sol_array(year, month=None, day=None, leap=False, datetime=False):
+    """lun2sol_array(year, month, day, leap=False, datetime=False) -> (result, mask)
+    Array version of lun2sol. Arguments are broadcasted each other, and
+    year can be a structured array returned by sol2lun_array instead.
+    Returns array of Gregorian ordinals (or numpy.datetime64 values when
+    datetime is true), and boolean array which is true for wrong dates
+    (the corresponding elements of result are zero or NaT)."""
+    numpy, monthtable, yeartable, leaptable, dtype = _getnptables()
+    if month is None:
+        year = numpy.asarray(year)
+        year, month, day, leap = year['year'], year['month'], year['day'], year['leap']
+    year, month, day, leap = numpy.broadcast_arrays(
+        numpy.asarray(year, numpy.int64) - _BASEYEAR,
+        numpy.asarray(month, numpy.int64), numpy.asarray(day, numpy.int64),
+        numpy.asarray(leap, numpy.bool_))
+    mask = (year < 0) | (year >= len(yeartable)) | (month < 1) | (month > 12)
+    year = numpy.where(mask, 0, year)
+    leapmonth = leaptable[year]
+    mask |= leap & (leapmonth != month)
+    months = yeartable[year] + month - 1
+    months += leap | ((leapmonth != 0) & (leapmonth < month))
+    months = numpy.where(mask, 0, months)
+    days = monthtable[months] + day - 1
+    mask |= (day < 1) | (days >= monthtable[months + 1])
+    days = numpy.where(mask, 0, days + _MINDATE)
+    if datetime:
+        days = numpy.where(mask, numpy.datetime64('NaT'),
+                           (days - _EPOCHORDINAL).astype('datetime64[D]'))
+    return days, mask
+
+###################################################################################
+## Bulk Ganzi Functions (uses NumPy if available)
+
+def _asintarray(values):
+    # returns values as NumPy array of integers, or None without NumPy.
+    try: import numpy
+    except ImportError: return None
+    return numpy.asarray(values, numpy.int64)
+
+def yearganzi_array(years):
+    """yearganzi_array(years) -> array of ganzi indices
+    Returns ganzi indices of given lunar years, same as the first item of
+    lunardate.getganzi. Returns NumPy array if NumPy is available, otherwise
+    list. Same for the other *ganzi_array functions."""
+    array = _asintarray(years)
+    if array is None: return [(year + 56) % 60 for year in years]
+    return (array + 56) % 60
+
+def monthganzi_array(years, months):
+    """monthganzi_array(years, months) -> array of ganzi indices
+    Returns ganzi indices of given lunar years and months, same as the
+    second item of lunardate.getganzi."""
+    yarray = _asintarray(years)
+    if yarray is None:
+        return [(year * 12 + month + 13) % 60 for year, month in izip(years, months)]
+    return (yarray * 12 + _asintarray(months) + 13) % 60
+
+def dayganzi_array(ordinals):
+    """dayganzi_array(ordinals) -> array of ganzi indices
+    Returns ganzi indices of given Gregorian ordinals, same as the third
+    item of lunardate.getganzi."""
+    array = _asintarray(ordinals)
+    if array is None: return [(days + 14) % 60 for days in ordinals]
+    return (array + 14) % 60
+
+def getganzistr_array(indices, locale=None):
+    """getganzistr_array(indices, locale=None) -> array of unicode strings
+    Returns ganzi strings of given ganzi indices like getganzistr, as NumPy
+    array of objects if NumPy is available, otherwise list."""
+    table = _ganzitable(locale or _DEFAULTLOCALE or _getdefaultlocale())
+    array = _asintarray(indices)
+    if array is None: return [table[index % 60] for index in indices]
+    import numpy
+    return numpy.array(table, object)[array % 60]
 
 ###################################################################################
 ## Class Declaration
@@ -317,15 +665,31 @@ def strftime(format, t=None):
 # just alias. we have lunardate, so why not we have solardate?
 solardate = date
 
+# lunardate class is created by typeproxy, because default type class always
+# allows setting class variable.
+class typeproxy(type):
+    def __setattr__(self, name, value):
+        raise AttributeError, "can't set attribute."
+
 class lunardate(date):
     """lunardate(year, month, day, leap=False) -> new lunardate object"""
 
+    __metaclass__ = typeproxy
+    __slots__ = ['lunaryear', 'lunarmonth', 'lunarday', 'lunarleap']
+
     def __new__(cls, year, month, day, leap=False):
-        obj = date.__new__(cls, *lun2sol(year, month, day, leap)[:3])
-        object.__setattr__(obj, 'lunaryear', year)
-        object.__setattr__(obj, 'lunarmonth', month)
-        object.__setattr__(obj, 'lunarday', day)
-        object.__setattr__(obj, 'lunarleap', leap)
+        return cls._new(date.fromordinal(_lun2ord(year, month, day, leap)),
+                        (year, month, day, leap))
+
+    def _new(cls, solar, lunar):
+        # trusted constructor: solar is a date object and lunar is a tuple of
+        # corresponding lunar fields, both assumed to be valid already.
+        obj = date.__new__(cls, solar.year, solar.month, solar.day)
+        setfield = object.__setattr__
+        setfield(obj, 'lunaryear', lunar[0])
+        setfield(obj, 'lunarmonth', lunar[1])
+        setfield(obj, 'lunarday', lunar[2])
+        setfield(obj, 'lunarleap', lunar[3])
         return obj
     
     def __repr__(self):
@@ -344,15 +708,19 @@ class lunardate(date):
         raise AttributeError, "can't set attribute."
     
     def __add__(self, other):
-        return self.fromsolardate(date.__add__(self, other))
+        result = date.__add__(self, other)
+        if result is NotImplemented: return result
+        return self._new(result, _ord2lun(result.toordinal()))
     
     def __radd__(self, other):
-        return self.fromsolardate(date.__radd__(self, other))
+        result = date.__radd__(self, other)
+        if result is NotImplemented: return result
+        return self._new(result, _ord2lun(result.toordinal()))
     
     def __sub__(self, other):
         result = date.__sub__(self, other)
-        if not isinstance(result, timedelta):
-            result = self.fromsolardate(result)
+        if isinstance(result, date):
+            result = self._new(result, _ord2lun(result.toordinal()))
         return result
 
     def replace(self, year=None, month=None, day=None, leap=None):
@@ -360,7 +728,37 @@ class lunardate(date):
         Same as date.replace, but returns lunardate object instead of date object."""
         if leap is None: leap = self.lunarleap
         return self.__class__(year or self.lunaryear, month or self.lunarmonth,
-                              day or self.month, leap)
+                              day or self.lunarday, leap)
+
+    def add_months(self, months, clamp=True):
+        """lunardate.add_months(months, clamp=True) -> new lunardate object
+        Returns lunardate object of the same lunar day, given number of lunar
+        months later (or earlier if months is negative). Leap months are
+        counted as ordinary months. If the resulting month doesn't have
+        the day (i.e. the 30th day of 29-day month), the last day of the month
+        is used when clamp is true, otherwise ValueError is raised."""
+        months += _monthindex(self.lunaryear, self.lunarmonth, self.lunarleap)
+        ordinal, day = _monthday(months, self.lunarday, clamp)
+        year, month, leap = _monthfields(months)
+        return self._new(date.fromordinal(ordinal), (year, month, day, leap))
+
+    def add_years(self, years, clamp=True):
+        """lunardate.add_years(years, clamp=True) -> new lunardate object
+        Returns lunardate object of the same lunar month and day, given number
+        of lunar years later (or earlier if years is negative). If the
+        resulting year doesn't have the leap month, the ordinary month of the
+        same number is used when clamp is true; the day is also clamped like
+        lunardate.add_months. Otherwise ValueError is raised."""
+        year = self.lunaryear + years
+        month = self.lunarmonth
+        leap = self.lunarleap
+        if leap and 0 <= year - _BASEYEAR < len(_YEARTABLE) and \
+           _LEAPTABLE[year - _BASEYEAR] != month:
+            if not clamp:
+                raise ValueError, "wrong leap month"
+            leap = False
+        ordinal, day = _monthday(_monthindex(year, month, leap), self.lunarday, clamp)
+        return self._new(date.fromordinal(ordinal), (year, month, day, leap))
     
     def tosolardate(self):
         """lunardate.tosolardate() -> date object
@@ -375,7 +773,7 @@ class lunardate(date):
     def fromsolardate(self, solardate):
         """lunardate.fromsolardate(solardate) -> new lunardate object
         Returns corresponding lunardate object from date object."""
-        return self(*sol2lun(*solardate.timetuple()[:3]))
+        return self._new(solardate, _ord2lun(solardate.toordinal()))
     
     def fromtimestamp(self, timestamp):
         """lunardate.fromtimestamp(timestamp) -> new lunardate object
@@ -385,7 +783,27 @@ class lunardate(date):
     def fromordinal(self, ordinal):
         """lunardate.fromordinal(ordinal) -> new lunardate object
         Returns corresponding lunardate object from Gregorian ordinal."""
-        return self.fromsolardate(date.fromordinal(ordinal))
+        return self._new(date.fromordinal(ordinal), _ord2lun(ordinal))
+
+    def tolunarordinal(self):
+        """lunardate.tolunarordinal() -> integer
+        Returns lunar ordinal, the number of days since the first day of the
+        calendar table (lunar 1881-01-01), which is 1. Subtracting two lunar
+        ordinals gives the number of days between them."""
+        return self.toordinal() - _MINDATE + 1
+
+    def fromlunarordinal(self, ordinal):
+        """lunardate.fromlunarordinal(ordinal) -> new lunardate object
+        Returns corresponding lunardate object from lunar ordinal."""
+        ordinal += _MINDATE - 1
+        return self._new(date.fromordinal(ordinal), _ord2lun(ordinal))
+
+    def tomonthindex(self):
+        """lunardate.tomonthindex() -> integer
+        Returns the number of lunar months since the first month of the
+        calendar table, counting leap months too. Subtracting two month
+        indices gives the number of months between them."""
+        return _monthindex(self.lunaryear, self.lunarmonth, self.lunarleap)
     
     def getganzi(self):
         """lunardate.getganzi() -> (year_ganzi, month_ganzi, day_ganzi)
@@ -399,30 +817,1105 @@ class lunardate(date):
         """lunardate.getganzistr(locale=None) -> 3-tuple of unicode string
         Returns unicode string of ganzi from lunardate object.
         See getganzistr global function for detail."""
-        return tuple([getganzistr(i, locale) for i in self.getganzi()])
+        table = _ganzitable(locale or _DEFAULTLOCALE or _getdefaultlocale())
+        return tuple([table[i] for i in self.getganzi()])
 
     def strftime(self, format):
         """lunardate.strftime(format) -> string
         Returns formatted string of lunardate object.
         See strftime global function for detail."""
-        return strftime(format, self.timetuple())
+        template, codes, hassolar = _compilestrftime(format)
+        if codes:
+            lunar = (self.lunaryear, self.lunarmonth, self.lunarday, self.lunarleap)
+            days = self.toordinal()
+            template %= tuple([code(lunar, days) for code in codes])
+        if hassolar: return time.strftime(template, self.timetuple())
+        return template
+
+    def __reduce__(self):
+        return (_fromint, (self.__class__, self.to_int()))
+
+    def to_int(self):
+        """lunardate.to_int() -> integer
+        Returns lunar date packed into an integer less than 2**24, which is
+        year << 10 | month << 6 | leap << 5 | day. It can be converted back
+        by lunardate.from_int."""
+        return self.lunaryear << 10 | self.lunarmonth << 6 | \
+               (self.lunarleap and 32) | self.lunarday
+
+    def from_int(cls, value):
+        """lunardate.from_int(value) -> new lunardate object
+        Returns lunardate object from packed integer. See lunardate.to_int."""
+        lunar = (value >> 10, (value >> 6) & 15, value & 31, value & 32 == 32)
+        return cls._new(date.fromordinal(_lun2ord(*lunar)), lunar)
     
     today = classmethod(today)
     fromsolardate = classmethod(fromsolardate)
     fromtimestamp = classmethod(fromtimestamp)
     fromordinal = classmethod(fromordinal)
+    fromlunarordinal = classmethod(fromlunarordinal)
+    from_int = classmethod(from_int)
+    _new = classmethod(_new)
+
+class lunaryearinfo(object):
+    """lunaryearinfo(year) -> information of given lunar year
+    Use yearinfo function instead, which returns precomputed object.
+
+    Attributes are: year, leapmonth (0 if the year doesn't have leap month),
+    ganzi (ganzi index of the year), start (Gregorian ordinal of the first
+    day), days (number of days), monthstarts and monthlengths (tuples of
+    Gregorian ordinals of the first days, and the number of days, of each
+    month in order; leap month follows the ordinary month)."""
+
+    __metaclass__ = typeproxy
+    __slots__ = ['year', 'leapmonth', 'ganzi', 'start', 'days',
+                 'monthstarts', 'monthlengths']
+
+    def __init__(self, year):
+        first = _monthindex(year, 1)
+        leapmonth = _LEAPTABLE[year - _BASEYEAR]
+        last = first + (leapmonth and 13 or 12)
+        starts = tuple([days + _MINDATE for days in _MONTHTABLE[first:last+1]])
+        setfield = object.__setattr__
+        setfield(self, 'year', year)
+        setfield(self, 'leapmonth', leapmonth)
+        setfield(self, 'ganzi', (year + 56) % 60)
+        setfield(self, 'start', starts[0])
+        setfield(self, 'days', starts[-1] - starts[0])
+        setfield(self, 'monthstarts', starts[:-1])
+        setfield(self, 'monthlengths',
+                 tuple([starts[i+1] - starts[i] for i in xrange(len(starts) - 1)]))
+
+    def __repr__(self):
+        return '%s.%s(%d)' % (self.__class__.__module__, self.__class__.__name__,
+                              self.year)
 
-# we create new lunardate class from old lunardate class using typeproxy,
-# because default type class always allows setting class variable.
-# __slots__ is added later to forbid descriptor initialization by type.
-class typeproxy(type):
     def __setattr__(self, name, value):
         raise AttributeError, "can't set attribute."
-clsdict = dict(lunardate.__dict__)
-clsdict['__slots__'] = ['lunaryear', 'lunarmonth', 'lunarday', 'lunarleap']
-lunardate = typeproxy(lunardate.__name__, lunardate.__bases__, clsdict)
+
+    def monthindex(self, month, leap=False):
+        """lunaryearinfo.monthindex(month, leap=False) -> integer
+        Returns index of given month in monthstarts and monthlengths."""
+        if not 1 <= month <= 12:
+            raise ValueError, "wrong month"
+        if leap:
+            if self.leapmonth != month:
+                raise ValueError, "wrong leap month"
+            return month
+        if (self.leapmonth or 13) < month: return month
+        return month - 1
+
+    def monthstart(self, month, leap=False):
+        """lunaryearinfo.monthstart(month, leap=False) -> Gregorian ordinal
+        Returns Gregorian ordinal of the first day of given month."""
+        return self.monthstarts[self.monthindex(month, leap)]
+
+    def monthlength(self, month, leap=False):
+        """lunaryearinfo.monthlength(month, leap=False) -> 29 or 30
+        Returns the number of days of given month."""
+        return self.monthlengths[self.monthindex(month, leap)]
+
+    def isvalid(self, month, day, leap=False):
+        """lunaryearinfo.isvalid(month, day, leap=False) -> bool
+        Returns true if given month and day exist in the year."""
+        if not 1 <= month <= 12 or leap and self.leapmonth != month:
+            return False
+        if leap or (self.leapmonth or 13) < month:
+            return 1 <= day <= self.monthlengths[month]
+        return 1 <= day <= self.monthlengths[month - 1]
+
+class lunarvalue(object):
+    """lunarvalue(year, month, day, leap=False) -> new lunarvalue object
+    Lightweight alternative of lunardate, which only holds Gregorian ordinal
+    and lunar fields. It is ordered by dates and hashable, has the same lunar
+    fields and ordinal attribute, and supports addition and subtraction of
+    timedelta, but is cheaper to create since it is not a date object. Use
+    tolunardate for anything else."""
+
+    __metaclass__ = typeproxy
+    __slots__ = ['ordinal', 'lunaryear', 'lunarmonth', 'lunarday', 'lunarleap']
+
+    def __new__(cls, year, month, day, leap=False):
+        return cls._new(_lun2ord(year, month, day, leap), (year, month, day, leap))
+
+    def _new(cls, ordinal, lunar):
+        # trusted constructor like lunardate._new.
+        obj = object.__new__(cls)
+        setfield = object.__setattr__
+        setfield(obj, 'ordinal', ordinal)
+        setfield(obj, 'lunaryear', lunar[0])
+        setfield(obj, 'lunarmonth', lunar[1])
+        setfield(obj, 'lunarday', lunar[2])
+        setfield(obj, 'lunarleap', lunar[3])
+        return obj
+
+    def __repr__(self):
+        return '%s.%s(%d, %d, %d, %s)' % \
+               (self.__class__.__module__, self.__class__.__name__,
+                self.lunaryear, self.lunarmonth, self.lunarday, self.lunarleap)
+
+    __str__ = __repr__
+
+    def __reduce__(self):
+        return (self.__class__, (self.lunaryear, self.lunarmonth, self.lunarday,
+                                 self.lunarleap))
+
+    def __setattr__(self, name, value):
+        raise AttributeError, "can't set attribute."
+
+    def __delattr__(self, name):
+        raise AttributeError, "can't delete attribute."
+
+    def __hash__(self):
+        return hash(self.ordinal)
+
+    def __eq__(self, other):
+        if isinstance(other, lunarvalue): return self.ordinal == other.ordinal
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, lunarvalue): return self.ordinal != other.ordinal
+        return NotImplemented
+
+    def _compare(self, other):
+        # returns the difference of ordinals for ordering comparison, which
+        # is not defined for other types as date does.
+        if isinstance(other, lunarvalue): return self.ordinal - other.ordinal
+        raise TypeError, "can't compare %s to %s" % \
+                         (self.__class__.__name__, other.__class__.__name__)
+
+    def __lt__(self, other):
+        return self._compare(other) < 0
+
+    def __le__(self, other):
+        return self._compare(other) <= 0
+
+    def __gt__(self, other):
+        return self._compare(other) > 0
+
+    def __ge__(self, other):
+        return self._compare(other) >= 0
+
+    def __add__(self, other):
+        if isinstance(other, timedelta):
+            return self.fromordinal(self.ordinal + other.days)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, timedelta):
+            return self.fromordinal(self.ordinal - other.days)
+        if isinstance(other, (lunarvalue, date)):
+            return timedelta(days=self.ordinal - other.toordinal())
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, date):
+            return timedelta(days=other.toordinal() - self.ordinal)
+        return NotImplemented
+
+    def fromordinal(cls, ordinal):
+        """lunarvalue.fromordinal(ordinal) -> new lunarvalue object
+        Returns corresponding lunarvalue object from Gregorian ordinal."""
+        return cls._new(ordinal, _ord2lun(ordinal))
+
+    def fromdate(cls, d):
+        """lunarvalue.fromdate(date) -> new lunarvalue object
+        Returns corresponding lunarvalue object from date object (including
+        lunardate object, whose lunar fields are reused)."""
+        if isinstance(d, lunardate):
+            return cls._new(d.toordinal(), (d.lunaryear, d.lunarmonth,
+                                            d.lunarday, d.lunarleap))
+        return cls.fromordinal(d.toordinal())
+
+    def from_int(cls, value):
+        """lunarvalue.from_int(value) -> new lunarvalue object
+        Returns lunarvalue object from packed integer. See lunardate.to_int."""
+        lunar = (value >> 10, (value >> 6) & 15, value & 31, value & 32 == 32)
+        return cls._new(_lun2ord(*lunar), lunar)
+
+    def to_int(self):
+        """lunarvalue.to_int() -> integer
+        Returns lunar date packed into an integer, same as lunardate.to_int."""
+        return self.lunaryear << 10 | self.lunarmonth << 6 | \
+               (self.lunarleap and 32) | self.lunarday
+
+    def toordinal(self):
+        """lunarvalue.toordinal() -> Gregorian ordinal"""
+        return self.ordinal
+
+    def tosolardate(self):
+        """lunarvalue.tosolardate() -> date object
+        Returns corresponding date object."""
+        return date.fromordinal(self.ordinal)
+
+    def tolunardate(self):
+        """lunarvalue.tolunardate() -> lunardate object
+        Returns corresponding lunardate object."""
+        return lunardate._new(date.fromordinal(self.ordinal),
+                              (self.lunaryear, self.lunarmonth, self.lunarday,
+                               self.lunarleap))
+
+    fromordinal = classmethod(fromordinal)
+    fromdate = classmethod(fromdate)
+    from_int = classmethod(from_int)
+    _new = classmethod(_new)
+
 del typeproxy
 
+_YEARINFO = None # list of lunaryearinfo for all years, built at the first use
+
+def yearinfo(year):
+    """yearinfo(year) -> lunaryearinfo object
+    Returns information of given lunar year, such as its leap month and the
+    length of each month. See lunaryearinfo for detail."""
+    global _YEARINFO
+    if _YEARINFO is None:
+        _YEARINFO = [lunaryearinfo(_BASEYEAR + i) for i in xrange(len(_YEARTABLE))]
+    if not 0 <= year - _BASEYEAR < len(_YEARINFO):
+        raise ValueError, "year is out of range"
+    return _YEARINFO[year - _BASEYEAR]
+
+def _lunarfields(d):
+    # returns (ordinal, lunar) of date object, reusing fields of lunardate.
+    if isinstance(d, lunardate):
+        return d.toordinal(), (d.lunaryear, d.lunarmonth, d.lunarday, d.lunarleap)
+    if isinstance(d, lunarvalue):
+        return d.ordinal, (d.lunaryear, d.lunarmonth, d.lunarday, d.lunarleap)
+    ordinal = d.toordinal()
+    return ordinal, _ord2lun(ordinal)
+
+def _yearanchor(year, month, day, leap):
+    # returns (index of the month in _MONTHTABLE, ordinal) of given lunar
+    # month and day in given year, clamped like lunardate.add_years.
+    leap = leap and _LEAPTABLE[year - _BASEYEAR] == month
+    start = _monthindex(year, month, leap)
+    return start, _monthday(start, day, True)[0]
+
+def lunar_diff(a, b):
+    """lunar_diff(a, b) -> (years, months, days)
+    Returns the difference from a to b in lunar years, months and days:
+    b is days after the same lunar day as a (or the last day of the month
+    if it doesn't exist) in the month, which is months after the same month
+    as a in the lunar year, which is years after a. So it is same as
+    a.add_years(years).add_months(months) + timedelta(days) unless add_years
+    clamps the day. Leap months are counted like lunardate.add_months.
+
+    a and b can be date objects (including lunardate and lunarvalue). If b
+    is earlier than a, the difference from b to a is returned with negative
+    signs."""
+    aordinal, (ayear, amonth, aday, aleap) = _lunarfields(a)
+    bordinal, (byear, bmonth, bday, bleap) = _lunarfields(b)
+    if bordinal < aordinal:
+        years, months, days = lunar_diff(b, a)
+        return (-years, -months, -days)
+    # the year boundary is found with the same clamping as add_years.
+    years = byear - ayear
+    start, ordinal = _yearanchor(byear, amonth, aday, aleap)
+    if ordinal > bordinal:
+        years -= 1
+        start, ordinal = _yearanchor(ayear + years, amonth, aday, aleap)
+    months = _monthindex(byear, bmonth, bleap) - start
+    ordinal, day = _monthday(start + months, aday, True)
+    if ordinal > bordinal:
+        months -= 1
+        ordinal, day = _monthday(start + months, aday, True)
+    assert 0 <= months <= 12
+    return (years, months, bordinal - ordinal)
+
+def _fromint(cls, value):
+    # used for unpickling lunardate objects.
+    return cls.from_int(value)
+
+def pack_many(dates):
+    """pack_many(dates) -> string
+    Returns given date objects (including lunardate and lunarvalue objects)
+    packed into a string, 4 bytes per date. Each date is packed as
+    lunardate.to_int does, in little endian."""
+    from array import array
+    packed = array('I')
+    append = packed.append
+    for d in dates:
+        if isinstance(d, (lunardate, lunarvalue)):
+            append(d.to_int())
+        else:
+            year, month, day, leap = _ord2lun(d.toordinal())
+            append(year << 10 | month << 6 | (leap and 32) | day)
+    if sys.byteorder == 'big': packed.byteswap()
+    return packed.tostring()
+
+def unpack_many(data, cls=lunardate):
+    """unpack_many(data, cls=lunardate) -> list
+    Returns list of lunardate objects from the string returned by pack_many.
+    cls can be lunarvalue (or subclass of it or lunardate) instead."""
+    from array import array
+    packed = array('I')
+    if len(data) % packed.itemsize:
+        raise ValueError, "wrong size of packed data"
+    packed.fromstring(data)
+    if sys.byteorder == 'big': packed.byteswap()
+    isvalue = issubclass(cls, lunarvalue)
+    new = cls._new
+    fromordinal = date.fromordinal
+    result = []
+    append = result.append
+    for value in packed:
+        lunar = (value >> 10, (value >> 6) & 15, value & 31, value & 32 == 32)
+        days = _lun2ord(*lunar)
+        if isvalue: append(new(days, lunar))
+        else: append(new(fromordinal(days), lunar))
+    return result
+
+###################################################################################
+## Iteration
+
+def _iterord2lun(ordinals):
+    # same as map(_ord2lun, ordinals) but lazy, and it reuses the month found
+    # for the previous ordinal; walking nearby dates doesn't need any search.
+    months = None # no month is found yet
+    start = end = 0
+    for days in ordinals:
+        if not start <= days < end:
+            if not _MINDATE <= days <= _MAXDATE:
+                raise ValueError, "year is out of range"
+            # every month has at least 29 days
+            if months is None: months = _bisect(_MONTHTABLE, days - _MINDATE)
+            elif end <= days < end + 29: months += 1
+            elif start - 29 <= days < start: months -= 1
+            else: months = _bisect(_MONTHTABLE, days - _MINDATE)
+            start = _MONTHTABLE[months] + _MINDATE
+            end = _MONTHTABLE[months + 1] + _MINDATE
+            year, month, leap = _monthfields(months)
+        yield (year, month, days - start + 1, leap)
+
+def iterlunardates(start, stop, step=1, astuple=False):
+    """iterlunardates(start, stop, step=1, astuple=False) -> iterator
+    Returns an iterator of lunardate objects from start to stop (exclusive)
+    by step days, like xrange. start and stop can be date objects (including
+    lunardate), lunarvalue objects or Gregorian ordinals. Iterator yields
+    (year, month, day, leap) tuples instead if astuple is true.
+
+    It walks the calendar table incrementally, so it is much faster than
+    adding timedelta to lunardate object repeatedly."""
+    ordinals = xrange(_toordinal(start), _toordinal(stop), step)
+    if ordinals and not (_MINDATE <= ordinals[0] <= _MAXDATE and
+                         _MINDATE <= ordinals[-1] <= _MAXDATE):
+        raise ValueError, "year is out of range"
+    lunars = _iterord2lun(ordinals)
+    if astuple: return lunars
+    return imap(lunardate._new, imap(date.fromordinal, ordinals), lunars)
+
+def _istrftime(format, dates, batchsize):
+    template, codes, hassolar = _compilestrftime(format)
+    fromordinal = date.fromordinal
+    dates = iter(dates)
+    while True:
+        batch = map(_toordinal, islice(dates, batchsize))
+        if not batch: break
+        # each distinct date is formatted once, in order of ordinals
+        unique = sorted(set(batch))
+        if codes: lunars = _iterord2lun(unique)
+        else: lunars = repeat(None)
+        formatted = {}
+        for days, lunar in izip(unique, lunars):
+            result = template
+            if codes: result %= tuple([code(lunar, days) for code in codes])
+            if hassolar: result = time.strftime(result, fromordinal(days).timetuple())
+            formatted[days] = result
+        for days in batch:
+            yield formatted[days]
+
+def strftime_many(format, dates, file=None, batchsize=4096):
+    """strftime_many(format, dates, file=None, batchsize=4096) -> iterator or int
+    Formats each date in dates like strftime, where dates is an iterable of
+    date objects (including lunardate), lunarvalue objects or Gregorian
+    ordinals. Returns an iterator of formatted strings, or writes them to
+    file-like object one per line and returns the number of lines if file
+    is given.
+
+    The format is parsed only once, and dates are converted by batches of
+    given size in sorted order, so repeated or nearby dates share the work."""
+    results = _istrftime(format, dates, batchsize)
+    if file is None: return results
+    count = 0
+    write = file.write
+    for result in results:
+        write(result + '\n')
+        count += 1
+    return count
+
+###################################################################################
+## Anniversaries
+
+_ANNIVERSARYPOLICIES = ('clamp', 'next', 'skip', 'raise')
+
+def _anniversaries(month, day, leap, firstyear, lastyear, policy):
+    # yields (ordinal, lunar) of given lunar month and day in each year from
+    # firstyear to lastyear, applying policy if the day doesn't exist.
+    if policy not in _ANNIVERSARYPOLICIES:
+        raise ValueError, "unknown policy: %r" % policy
+    if not 1 <= month <= 12:
+        raise ValueError, "wrong month"
+    if not 1 <= day <= 30:
+        raise ValueError, "wrong day"
+    if firstyear is None: firstyear = _BASEYEAR
+    if lastyear is None: lastyear = _BASEYEAR + len(_YEARTABLE) - 1
+    if firstyear > lastyear: return
+    _monthindex(firstyear, 1) # checks range of years
+    _monthindex(lastyear, 1)
+    for year in xrange(firstyear - _BASEYEAR, lastyear - _BASEYEAR + 1):
+        leapmonth = _LEAPTABLE[year]
+        isleap = leap
+        if leap and leapmonth != month:
+            if policy == 'skip': continue
+            if policy == 'raise': raise ValueError, "wrong leap month"
+            isleap = False
+        months = _YEARTABLE[year] + month - 1
+        if isleap or (leapmonth or 13) < month:
+            months += 1
+        start = _MONTHTABLE[months] + _MINDATE
+        length = _MONTHTABLE[months + 1] + _MINDATE - start
+        if day <= length:
+            yield (start + day - 1, (year + _BASEYEAR, month, day, isleap))
+        elif policy == 'clamp':
+            yield (start + length - 1, (year + _BASEYEAR, month, length, isleap))
+        elif policy == 'next':
+            if months + 2 < len(_MONTHTABLE): # the next month is in the table
+                nextyear, nextmonth, nextleap = _monthfields(months + 1)
+                yield (start + length, (nextyear, nextmonth, 1, nextleap))
+        elif policy == 'raise':
+            raise ValueError, "wrong day"
+
+def anniversaries(month, day, leap=False, firstyear=None, lastyear=None,
+                  policy='clamp'):
+    """anniversaries(month, day, leap=False, firstyear=None, lastyear=None,
+                     policy='clamp') -> list of lunardate objects
+    Returns given lunar month and day of each lunar year from firstyear to
+    lastyear (inclusive; defaults to the whole range of the table).
+
+    policy decides what to do when the day doesn't exist in some year:
+      "clamp" - uses the last day of the month, i.e. 29th instead of 30th;
+      "next"  - uses the day after the last day of the month;
+      "skip"  - omits the year;
+      "raise" - raises ValueError.
+    If leap month is given and the year doesn't have it, the ordinary month
+    is used for "clamp" and "next"."""
+    fromordinal = date.fromordinal
+    return [lunardate._new(fromordinal(days), lunar) for days, lunar in
+            _anniversaries(month, day, leap, firstyear, lastyear, policy)]
+
+class anniversaryindex(object):
+    """anniversaryindex(policy='clamp') -> new anniversaryindex object
+    Index of recurring lunar dates, which answers which of them fall in given
+    solar date range. Each recurring date is added with a key by add method,
+    and lookup returns keys of dates in the range. policy is same as one of
+    anniversaries function.
+
+    The index keeps sorted ordinals of all distinct lunar dates added (at
+    most 720) in every year of the table, and builds it at the first lookup
+    after add."""
+
+    def __init__(self, policy='clamp'):
+        if policy not in _ANNIVERSARYPOLICIES:
+            raise ValueError, "unknown policy: %r" % policy
+        self.policy = policy
+        self._keys = {} # (month, day, leap) -> list of keys
+        self._ordinals = None
+        self._dates = None
+
+    def __len__(self):
+        return sum([len(keys) for keys in self._keys.itervalues()])
+
+    def add(self, key, month, day, leap=False):
+        """anniversaryindex.add(key, month, day, leap=False)
+        Adds given lunar month and day with key, which is returned by lookup."""
+        if not 1 <= month <= 12:
+            raise ValueError, "wrong month"
+        if not 1 <= day <= 30:
+            raise ValueError, "wrong day"
+        self._keys.setdefault((month, day, bool(leap)), []).append(key)
+        self._ordinals = self._dates = None
+
+    def _build(self):
+        entries = []
+        for lunar in self._keys:
+            entries.extend([(days, lunar) for days, _ in
+                            _anniversaries(lunar[0], lunar[1], lunar[2],
+                                           None, None, self.policy)])
+        entries.sort()
+        from array import array
+        self._ordinals = array('i', [days for days, lunar in entries])
+        self._dates = [lunar for days, lunar in entries]
+
+    def lookup(self, start, stop):
+        """anniversaryindex.lookup(start, stop) -> list of (date, key)
+        Returns (date object, key) pairs of recurring dates in given range,
+        from start to stop (exclusive), in order of dates. start and stop can
+        be date objects or Gregorian ordinals."""
+        if self._ordinals is None: self._build()
+        from bisect import bisect_left
+        start = _toordinal(start)
+        stop = _toordinal(stop)
+        ordinals = self._ordinals
+        result = []
+        for i in xrange(bisect_left(ordinals, start), bisect_left(ordinals, stop)):
+            solar = date.fromordinal(ordinals[i])
+            result.extend([(solar, key) for key in self._keys[self._dates[i]]])
+        return result
+
+###################################################################################
+## Holidays
+
+# holiday rules are (name, calendar, month, day, offset, length) tuples, where
+# calendar is "lunar" or "solar", and the holiday spans length days from
+# offset days after given month and day. rule packs are compiled at the first
+# use by holidays function.
+_HOLIDAYRULES = {
+    'ko': [
+        ('sinjeong', 'solar', 1, 1, 0, 1),
+        ('seollal', 'lunar', 1, 1, -1, 3),
+        ('samiljeol', 'solar', 3, 1, 0, 1),
+        ('buddhasbirthday', 'lunar', 4, 8, 0, 1),
+        ('childrensday', 'solar', 5, 5, 0, 1),
+        ('dano', 'lunar', 5, 5, 0, 1),
+        ('memorialday', 'solar', 6, 6, 0, 1),
+        ('gwangbokjeol', 'solar', 8, 15, 0, 1),
+        ('chuseok', 'lunar', 8, 15, -1, 3),
+        ('gaecheonjeol', 'solar', 10, 3, 0, 1),
+        ('hangeulnal', 'solar', 10, 9, 0, 1),
+        ('christmas', 'solar', 12, 25, 0, 1),
+    ],
+    'zh': [
+        ('yuandan', 'solar', 1, 1, 0, 1),
+        ('chunjie', 'lunar', 1, 1, -1, 8),
+        ('yuanxiao', 'lunar', 1, 15, 0, 1),
+        ('laodongjie', 'solar', 5, 1, 0, 1),
+        ('duanwu', 'lunar', 5, 5, 0, 1),
+        ('qixi', 'lunar', 7, 7, 0, 1),
+        ('zhongqiu', 'lunar', 8, 15, 0, 1),
+        ('guoqing', 'solar', 10, 1, 0, 7),
+        ('chongyang', 'lunar', 9, 9, 0, 1),
+    ],
+}
+_HOLIDAYINDEX = {} # pack name -> compiled holidayindex
+
+class holidayindex(object):
+    """holidayindex(rules) -> new holidayindex object
+    Index of holidays compiled from given rules, for the whole range of the
+    calendar table. Each rule is (name, calendar, month, day, offset, length)
+    tuple: the holiday named name spans length days, starting offset days
+    after given month and day of calendar ("lunar" or "solar") in each
+    year. For example, ('seollal', 'lunar', 1, 1, -1, 3) is the lunar new
+    year's day with the day before and after. Lunar 30th day is moved to
+    29th in the months of 29 days.
+
+    Holidays are returned as (name, delta) pairs, where delta is the number
+    of days from given month and day; -1 for the day before, for example."""
+
+    def __init__(self, rules):
+        bydate = {}
+        firstyear = date.fromordinal(_MINDATE).year
+        lastyear = date.fromordinal(_MAXDATE).year
+        for name, calendar, month, day, offset, length in rules:
+            if calendar == 'lunar':
+                bases = [days for days, lunar in
+                         _anniversaries(month, day, False, None, None, 'clamp')]
+            elif calendar == 'solar':
+                bases = []
+                for year in xrange(firstyear, lastyear + 1):
+                    try: bases.append(date(year, month, day).toordinal())
+                    except ValueError: pass # February 29th
+            else:
+                raise ValueError, "unknown calendar: %r" % calendar
+            if length < 1:
+                raise ValueError, "wrong length: %r" % length
+            for base in bases:
+                for delta in xrange(offset, offset + length):
+                    bydate.setdefault(base + delta, []).append((name, delta))
+        from array import array
+        self._bydate = dict([(days, tuple(names)) for days, names in bydate.iteritems()])
+        self._ordinals = array('i', sorted(bydate))
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def get(self, d):
+        """holidayindex.get(date) -> tuple of (name, delta)
+        Returns holidays on given date object or Gregorian ordinal, or empty
+        tuple if it's not a holiday."""
+        return self._bydate.get(_toordinal(d), ())
+
+    def between(self, start, stop):
+        """holidayindex.between(start, stop) -> list of (date, name, delta)
+        Returns holidays from start to stop (exclusive) in order of dates.
+        start and stop can be date objects or Gregorian ordinals."""
+        from bisect import bisect_left
+        start = _toordinal(start)
+        stop = _toordinal(stop)
+        ordinals = self._ordinals
+        result = []
+        for i in xrange(bisect_left(ordinals, start), bisect_left(ordinals, stop)):
+            solar = date.fromordinal(ordinals[i])
+            result.extend([(solar, name, delta)
+                           for name, delta in self._bydate[ordinals[i]]])
+        return result
+
+def holidays(pack='ko'):
+    """holidays(pack='ko') -> holidayindex object
+    Returns holiday index of given rule pack, which is "ko" (Korea), "zh"
+    (China) or registered by registerholidays. It is compiled at the first
+    use. Historical changes of holidays are not considered."""
+    try:
+        return _HOLIDAYINDEX[pack]
+    except KeyError:
+        try: rules = _HOLIDAYRULES[pack]
+        except KeyError: raise ValueError, "unknown holiday pack: %r" % pack
+        index = _HOLIDAYINDEX[pack] = holidayindex(rules)
+        return index
+
+def registerholidays(pack, rules):
+    """registerholidays(pack, rules)
+    Registers (or replaces) holiday rule pack of given name, used by
+    holidays function. See holidayindex for the format of rules."""
+    _HOLIDAYRULES[pack] = list(rules)
+    _HOLIDAYINDEX.pop(pack, None)
+
+###################################################################################
+## Recurrence Rules
+
+class _recurrence(object):
+    # base class of recurrence rules. subclasses implement _occurrences,
+    # which returns all Gregorian ordinals in the range of the table.
+
+    _ordinals = None
+
+    def _getordinals(self):
+        if self._ordinals is None:
+            from array import array
+            ordinals = [days for days in set(self._occurrences())
+                        if _MINDATE <= days <= _MAXDATE]
+            ordinals.sort()
+            self._ordinals = array('i', ordinals)
+        return self._ordinals
+
+    def next_after(self, d):
+        """rule.next_after(date) -> lunardate object or None
+        Returns the first occurrence after given date object or Gregorian
+        ordinal, or None if there is no more occurrence in the table."""
+        from bisect import bisect_right
+        d = _toordinal(d)
+        ordinals = self._getordinals()
+        index = bisect_right(ordinals, d)
+        if index == len(ordinals): return None
+        return lunardate.fromordinal(ordinals[index])
+
+    def prev_before(self, d):
+        """rule.prev_before(date) -> lunardate object or None
+        Returns the last occurrence before given date object or Gregorian
+        ordinal, or None if there is no such occurrence in the table."""
+        from bisect import bisect_left
+        d = _toordinal(d)
+        ordinals = self._getordinals()
+        index = bisect_left(ordinals, d)
+        if index == 0: return None
+        return lunardate.fromordinal(ordinals[index - 1])
+
+    def between(self, start, stop):
+        """rule.between(start, stop) -> list of lunardate objects
+        Returns occurrences from start to stop (exclusive), which can be date
+        objects or Gregorian ordinals."""
+        from bisect import bisect_left
+        start = _toordinal(start)
+        stop = _toordinal(stop)
+        ordinals = self._getordinals()
+        return map(lunardate.fromordinal, ordinals[bisect_left(ordinals, start):
+                                                   bisect_left(ordinals, stop)])
+
+def _checkdays(days, maxday):
+    days = tuple(days)
+    for day in days:
+        if not 1 <= abs(day) <= maxday:
+            raise ValueError, "wrong day: %r" % day
+    return days
+
+def _checkmonths(months):
+    if months is None: return None
+    months = tuple(months)
+    for month in months:
+        if not 1 <= month <= 12:
+            raise ValueError, "wrong month: %r" % month
+    return months
+
+def _dayinmonth(start, length, day, missing):
+    # returns ordinal of given day in the month, or None. day can be negative.
+    if day < 0: day += length + 1
+    if 1 <= day <= length: return start + day - 1
+    if day > length:
+        if missing == 'clamp': return start + length - 1
+        if missing == 'next': return start + length
+    return None
+
+class lunarrule(_recurrence):
+    """lunarrule(days, months=None, leap='include', missing='skip') -> new lunarrule object
+    Recurrence rule of given lunar days in each lunar month, or in given
+    months of each year if months is given. days can be negative to count
+    from the end of the month; -1 is the last day.
+
+    leap decides how leap months are treated: "include" (the default) fires
+    in leap months like ordinary months of the same number, "exclude" skips
+    leap months, and "only" fires only in leap months. missing decides what
+    to do for the days which don't exist in 29-day months: "skip" (the
+    default), "clamp" (uses the last day) or "next" (uses the next day).
+
+    For example, lunarrule([1, 15]) fires every lunar 1st and 15th,
+    lunarrule([-1]) at the last day of each lunar month, and
+    lunarrule([3], [3], leap='exclude') at lunar 3/3 every year.
+    Occurrences are precomputed at the first query and then found by binary
+    search. The same applies to solarrule and ruleset."""
+
+    def __init__(self, days, months=None, leap='include', missing='skip'):
+        if leap not in ('include', 'exclude', 'only'):
+            raise ValueError, "unknown leap policy: %r" % leap
+        if missing not in ('skip', 'clamp', 'next'):
+            raise ValueError, "unknown missing day policy: %r" % missing
+        self.days = _checkdays(days, 30)
+        self.months = _checkmonths(months)
+        self.leap = leap
+        self.missing = missing
+
+    def __repr__(self):
+        return '%s.%s(%r, %r, %r, %r)' % \
+               (self.__class__.__module__, self.__class__.__name__,
+                list(self.days), self.months and list(self.months),
+                self.leap, self.missing)
+
+    def _occurrences(self):
+        for months in xrange(len(_MONTHTABLE) - 1):
+            year, month, leap = _monthfields(months)
+            if self.months is not None and month not in self.months: continue
+            if leap and self.leap == 'exclude': continue
+            if not leap and self.leap == 'only': continue
+            start = _MONTHTABLE[months] + _MINDATE
+            length = _MONTHTABLE[months + 1] - _MONTHTABLE[months]
+            for day in self.days:
+                days = _dayinmonth(start, length, day, self.missing)
+                if days is not None: yield days
+
+class solarrule(_recurrence):
+    """solarrule(days, months=None, missing='skip') -> new solarrule object
+    Recurrence rule of given days in each solar month, or in given months
+    of each year if months is given. days and missing are same as lunarrule.
+    Only occurrences in the range of the calendar table are considered."""
+
+    def __init__(self, days, months=None, missing='skip'):
+        if missing not in ('skip', 'clamp', 'next'):
+            raise ValueError, "unknown missing day policy: %r" % missing
+        self.days = _checkdays(days, 31)
+        self.months = _checkmonths(months)
+        self.missing = missing
+
+    def __repr__(self):
+        return '%s.%s(%r, %r, %r)' % \
+               (self.__class__.__module__, self.__class__.__name__,
+                list(self.days), self.months and list(self.months), self.missing)
+
+    def _occurrences(self):
+        months = self.months or range(1, 13)
+        for year in xrange(date.fromordinal(_MINDATE).year,
+                           date.fromordinal(_MAXDATE).year + 1):
+            for month in months:
+                start = date(year, month, 1).toordinal()
+                if month == 12: end = date(year + 1, 1, 1).toordinal()
+                else: end = date(year, month + 1, 1).toordinal()
+                for day in self.days:
+                    days = _dayinmonth(start, end - start, day, self.missing)
+                    if days is not None: yield days
+
+class ruleset(_recurrence):
+    """ruleset(*rules) -> new ruleset object
+    Recurrence rule which fires whenever any of given rules (lunarrule,
+    solarrule or ruleset objects) fires."""
+
+    def __init__(self, *rules):
+        self.rules = rules
+
+    def __repr__(self):
+        return '%s.%s(%s)' % (self.__class__.__module__, self.__class__.__name__,
+                              ', '.join(map(repr, self.rules)))
+
+    def _occurrences(self):
+        for rule in self.rules:
+            for days in rule._getordinals(): yield days
+
+###################################################################################
+## Batch Conversion
+
+_PARSERCODES = {
+    'Y': r'(?P<Y>\d+)',
+    'm': r'(?P<m>\d\d?)',
+    'd': r'(?P<d>\d\d?)',
+    'l': r'(?P<l>[01]?)',
+}
+
+def _compileparser(format):
+    # returns match method of the regexp for given input format, which
+    # consists of %Y, %m, %d, %l (0 or 1, can be omitted) and literal text.
+    import re
+    pattern = []
+    pos = 0
+    while True:
+        next = format.find('%', pos)
+        if next < 0: break
+        pattern.append(re.escape(format[pos:next]))
+        code = format[next+1:next+2]
+        if code == '%': pattern.append('%')
+        elif code in _PARSERCODES and _PARSERCODES[code] not in pattern:
+            pattern.append(_PARSERCODES[code])
+        else:
+            raise ValueError, "wrong input format: %r" % format
+        pos = next + 2
+    pattern.append(re.escape(format[pos:]))
+    for code in 'Ymd':
+        if _PARSERCODES[code] not in pattern:
+            raise ValueError, "input format needs %%Y, %%m and %%d: %r" % format
+    return re.compile(''.join(pattern) + '$').match
+
+def _compileoutput(format):
+    # returns a function which formats (lunar, days) to the output line.
+    fromordinal = date.fromordinal
+    if format == 'tsv':
+        def output(lunar, days):
+            return '%s\t%04d-%02d-%02d\t%d' % ((fromordinal(days).isoformat(),) +
+                                               lunar[:3] + (lunar[3],))
+    elif format == 'json':
+        def output(lunar, days):
+            return '{"solar": "%s", "lunar": "%04d-%02d-%02d", "leap": %s}' % (
+                (fromordinal(days).isoformat(),) + lunar[:3] +
+                (lunar[3] and 'true' or 'false',))
+    else:
+        template, codes, hassolar = _compilestrftime(format)
+        def output(lunar, days):
+            result = template
+            if codes: result %= tuple([code(lunar, days) for code in codes])
+            if hassolar: result = time.strftime(result, fromordinal(days).timetuple())
+            return result
+    return output
+
+def convertlines(lines, fromlunar=False, informat='%Y-%m-%d', outformat='tsv',
+                 onerror=None):
+    """convertlines(lines, fromlunar=False, informat='%Y-%m-%d', outformat='tsv',
+                    onerror=None) -> iterator
+    Converts dates in lines (an iterable of strings, like file object), and
+    returns an iterator of converted lines without newline. Dates are solar
+    dates, or lunar dates if fromlunar is true.
+
+    informat describes each line with %Y, %m, %d, %l (leap month flag, 0 or
+    1, can be omitted) and literal text. outformat can be "tsv" (solar date,
+    lunar date and leap month flag separated by tabs), "json" (one JSON
+    object per line) or strftime format with lunar extensions.
+
+    Bad lines raise ValueError, or are skipped after calling
+    onerror(lineno, line, exc) if onerror is given. lineno starts from 1."""
+    parse = _compileparser(informat)
+    output = _compileoutput(outformat)
+    lineno = 0
+    for line in lines:
+        lineno += 1
+        try:
+            match = parse(line.rstrip('\r\n'))
+            if match is None:
+                raise ValueError, "doesn't match input format"
+            fields = match.groupdict()
+            year, month, day = int(fields['Y']), int(fields['m']), int(fields['d'])
+            leap = fields.get('l') == '1'
+            if fromlunar:
+                days = _lun2ord(year, month, day, leap)
+                lunar = (year, month, day, leap)
+            else:
+                days = date(year, month, day).toordinal()
+                lunar = _ord2lun(days)
+            result = output(lunar, days)
+        except ValueError, e:
+            if onerror is None:
+                raise ValueError, "line %d: %s" % (lineno, e)
+            onerror(lineno, line, e)
+        else:
+            yield result
+
+###################################################################################
+## Parallel Conversion
+
+def _splitfile(path, chunksize):
+    # returns list of (start, end) byte ranges covering given file, each of
+    # them is about chunksize bytes long and ends at the end of line.
+    f = open(path, 'rb')
+    try:
+        f.seek(0, 2)
+        size = f.tell()
+        ranges = []
+        start = 0
+        while start < size:
+            end = start + chunksize
+            if end < size:
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    finally:
+        f.close()
+    return ranges
+
+def _convertchunk(args):
+    # runs in worker process. returns (converted lines, errors, number of
+    # lines, number of bytes) of given byte range.
+    path, start, end, fromlunar, informat, outformat = args
+    f = open(path, 'rb')
+    try:
+        f.seek(start)
+        lines = f.read(end - start).splitlines(True)
+    finally:
+        f.close()
+    errors = []
+    def onerror(lineno, line, exc):
+        errors.append((lineno, line, str(exc)))
+    result = '\n'.join(convertlines(lines, fromlunar, informat, outformat, onerror))
+    if result: result += '\n'
+    return result, errors, len(lines), end - start
+
+def convertfile(path, output, fromlunar=False, informat='%Y-%m-%d', outformat='tsv',
+                onerror=None, workers=None, chunksize=1<<22, progress=None):
+    """convertfile(path, output, fromlunar=False, informat='%Y-%m-%d',
+                   outformat='tsv', onerror=None, workers=None, chunksize=1<<22,
+                   progress=None) -> number of lines
+    Same as convertlines, but converts the file of given path by chunks of
+    about chunksize bytes in a pool of given number of processes (default
+    is the number of CPUs), and writes converted lines to file-like object
+    output in the original order.
+
+    If progress is given, progress(bytes, totalbytes, lines, seconds) is
+    called after each chunk is written; bytes and lines are the amount of
+    input processed so far. onerror gets line numbers of the whole file."""
+    from multiprocessing import Pool, cpu_count
+    from collections import deque
+    _compileparser(informat) # fails early for wrong formats
+    _compileoutput(outformat)
+    ranges = _splitfile(path, chunksize)
+    totalbytes = ranges and ranges[-1][1] or 0
+    tasks = iter([(path, start, end, fromlunar, informat, outformat)
+                  for start, end in ranges])
+    starttime = time.time()
+    workers = workers or cpu_count()
+    pool = Pool(workers)
+    try:
+        # at most 2*workers chunks are in flight, so converted chunks waiting
+        # for the preceding one don't pile up in memory.
+        pending = deque([pool.apply_async(_convertchunk, (task,))
+                         for task in islice(tasks, 2 * workers)])
+        lines = nbytes = 0
+        while pending:
+            result, errors, nlines, size = pending.popleft().get()
+            for lineno, line, message in errors:
+                if onerror is None:
+                    raise ValueError, "line %d: %s" % (lines + lineno, message)
+                onerror(lines + lineno, line, ValueError(message))
+            output.write(result)
+            lines += nlines
+            nbytes += size
+            if progress is not None:
+                progress(nbytes, totalbytes, lines, time.time() - starttime)
+            for task in islice(tasks, 1):
+                pending.append(pool.apply_async(_convertchunk, (task,)))
+    finally:
+        pool.terminate()
+        pool.join()
+    return lines
+
+###################################################################################
+## CSV Enrichment
+
+# each function returns the value of the column from (lunar, days, ganzi),
+# where ganzi is a list of ganzi strings encoded in UTF-8, since csv module
+# only handles bytes.
+_CSVFIELDS = {
+    'lunaryear': lambda lunar, days, ganzi: str(lunar[0]),
+    'lunarmonth': lambda lunar, days, ganzi: str(lunar[1]),
+    'lunarday': lambda lunar, days, ganzi: str(lunar[2]),
+    'lunarleap': lambda lunar, days, ganzi: lunar[3] and '1' or '0',
+    'yearganzi': lambda lunar, days, ganzi: ganzi[(lunar[0] + 56) % 60],
+    'monthganzi': lambda lunar, days, ganzi: ganzi[(lunar[0] * 12 + lunar[1] + 13) % 60],
+    'dayganzi': lambda lunar, days, ganzi: ganzi[(days + 14) % 60],
+}
+
+def enrichcsv(input, output, column, fields=('lunaryear', 'lunarmonth', 'lunarday',
+              'lunarleap'), informat='%Y-%m-%d', locale=None, onerror=None,
+              chunksize=4096, dialect='excel'):
+    """enrichcsv(input, output, column, fields=('lunaryear', 'lunarmonth',
+                 'lunarday', 'lunarleap'), informat='%Y-%m-%d', locale=None,
+                 onerror=None, chunksize=4096, dialect='excel') -> number of rows
+    Reads CSV from file-like object input, and writes it to output with
+    given lunar fields of the solar date in given column appended. The
+    first row is a header, and gets field names appended. Returns the
+    number of rows except for the header.
+
+    fields can be "lunaryear", "lunarmonth", "lunarday", "lunarleap" (0 or
+    1), "yearganzi", "monthganzi" and "dayganzi" (UTF-8 encoded strings in
+    given locale). The date is parsed with informat like convertlines.
+    Rows with wrong date raise ValueError, or get empty fields after calling
+    onerror(rowno, row, exc) if onerror is given. rowno of the header is 1.
+
+    Rows are processed by chunks of given number of rows, and each distinct
+    date in the chunk is converted only once."""
+    import csv
+    parse = _compileparser(informat)
+    try: getters = [_CSVFIELDS[field] for field in fields]
+    except KeyError: raise ValueError, "unknown field: %r" % sys.exc_info()[1].args[0]
+    locale = locale or _DEFAULTLOCALE or _getdefaultlocale()
+    ganzi = [string.encode('utf-8') for string in _ganzitable(locale)]
+    reader = csv.reader(input, dialect)
+    writer = csv.writer(output, dialect)
+    try: header = reader.next()
+    except StopIteration: return 0
+    try: index = header.index(column)
+    except ValueError: raise ValueError, "no such column: %r" % column
+    writer.writerow(header + list(fields))
+    empty = [''] * len(getters)
+    rowno = 1
+    while True:
+        rows = list(islice(reader, chunksize))
+        if not rows: break
+        values = {}
+        for row in rows:
+            rowno += 1
+            text = index < len(row) and row[index] or ''
+            try:
+                cells = values[text]
+            except KeyError:
+                try:
+                    match = parse(text.strip())
+                    if match is None:
+                        raise ValueError, "doesn't match input format"
+                    parsed = match.groupdict()
+                    days = date(int(parsed['Y']), int(parsed['m']),
+                                int(parsed['d'])).toordinal()
+                    lunar = _ord2lun(days)
+                    cells = [getter(lunar, days, ganzi) for getter in getters]
+                except ValueError, e:
+                    cells = e
+                values[text] = cells
+            if isinstance(cells, ValueError):
+                if onerror is None:
+                    raise ValueError, "row %d: %s" % (rowno, cells)
+                onerror(rowno, row, cells)
+                cells = empty
+            if len(row) < len(header): row.extend([''] * (len(header) - len(row)))
+            row.extend(cells)
+        writer.writerows(rows)
+    return rowno - 1
+
 ###################################################################################
 ## Command Line Interface
 
@@ -446,6 +1939,63 @@ if __name__ == '__main__':
             solar = lunardate(*(map(int, sys.argv[2:5]) + [leap]))
             isleap = leap and ' (leap)' or ''
             print solar.strftime('lunar %LY-%Lm-%Ld' + isleap + ' -> solar %Y-%m-%d %a')
+        elif mode == 'batch':
+            import getopt
+            try: opts, args = getopt.getopt(sys.argv[2:], 'li:o:j:c:p')
+            except getopt.GetoptError: raise RuntimeError
+            if len(args) > 1: raise RuntimeError
+            opts = dict(opts)
+            if '-j' in opts and not args: raise RuntimeError
+            fromlunar = '-l' in opts
+            informat = opts.get('-i', '%Y-%m-%d')
+            outformat = opts.get('-o', 'tsv')
+            name = args and args[0] or '<stdin>'
+            errors = []
+            def onerror(lineno, line, exc):
+                errors.append(lineno)
+                sys.stderr.write('%s:%d: %s: %r\n' % (name, lineno, exc, line.rstrip('\r\n')))
+            if '-j' in opts:
+                def progress(nbytes, totalbytes, lines, seconds):
+                    sys.stderr.write('%3d%% %d lines, %.1f MB/s\n' % (
+                        nbytes * 100 // (totalbytes or 1), lines,
+                        nbytes / (seconds or 1e-9) / 1048576))
+                convertfile(args[0], sys.stdout, fromlunar, informat, outformat, onerror,
+                            int(opts['-j']) or None, int(opts.get('-c', 1<<22)),
+                            '-p' in opts and progress or None)
+            else:
+                if args: input = open(args[0], 'rU')
+                else: input = sys.stdin
+                write = sys.stdout.write
+                for line in convertlines(input, fromlunar, informat, outformat, onerror):
+                    write(line + '\n')
+            if errors: sys.exit(1)
+        elif mode == 'csv':
+            import getopt
+            try: opts, args = getopt.getopt(sys.argv[2:], 'i:f:g:')
+            except getopt.GetoptError: raise RuntimeError
+            if len(args) not in (1, 2): raise RuntimeError
+            opts = dict(opts)
+            if len(args) == 2: input = open(args[1], 'rb')
+            else: input = sys.stdin
+            name = len(args) == 2 and args[1] or '<stdin>'
+            errors = []
+            def onerror(rowno, row, exc):
+                errors.append(rowno)
+                sys.stderr.write('%s: row %d: %s\n' % (name, rowno, exc))
+            fields = opts.get('-f', 'lunaryear,lunarmonth,lunarday,lunarleap').split(',')
+            enrichcsv(input, sys.stdout, args[0], fields, opts.get('-i', '%Y-%m-%d'),
+                      opts.get('-g'), onerror)
+            if errors: sys.exit(1)
+        elif mode == 'serve':
+            import getopt, transdate_server
+            try: opts, args = getopt.getopt(sys.argv[2:], 'a:p:n:v')
+            except getopt.GetoptError: raise RuntimeError
+            if args: raise RuntimeError
+            opts = dict(opts)
+            host = opts.get('-a', '127.0.0.1')
+            port = int(opts.get('-p', 8000))
+            print 'Serving on http://%s:%d/ (press Ctrl-C to stop)' % (host, port)
+            transdate_server.serve(host, port, int(opts.get('-n', 64)), verbose='-v' in opts)
         else:
             raise RuntimeError
     except (IndexError, RuntimeError):
@@ -454,6 +2004,21 @@ if __name__ == '__main__':
         print '  for today - python %s today' % app
         print '  for solar to lunar - python %s solar <year> <month> <day>' % app
         print '  for lunar to solar - python %s lunar <year> <month> <day> [leap]' % app
+        print '  for many dates - python %s batch [-l] [-i <input format>] [-o <output format>]' % app
+        print '                                   [-j <processes> [-c <chunk size>] [-p]] [file]'
+        print '    reads one date per line (solar, or lunar with -l) from file or stdin.'
+        print '    input format uses %Y %m %d %l (default: %Y-%m-%d); output format is'
+        print '    tsv (default), json or strftime format with %L extensions.'
+        print '    -j converts the file in given number of processes (0 for all CPUs),'
+        print '    by chunks of given bytes; -p reports the progress to stderr.'
+        print '  for CSV files - python %s csv [-i <input format>] [-f <fields>] [-g <locale>] <column> [file]' % app
+        print '    appends lunar fields of the solar date in given column. fields are'
+        print '    comma-separated list of lunaryear, lunarmonth, lunarday, lunarleap,'
+        print '    yearganzi, monthganzi and dayganzi (default: the first four).'
+        print '  for HTTP/JSON server - python %s serve [-a <address>] [-p <port>] [-n <max requests>] [-v]' % app
+        print '    see transdate_server module for endpoints.'
+    except SystemExit:
+        raise
     except:
         print 'Error: %s' % sys.exc_info()[1]
 
@@ -0,0 +1,353 @@
+"""transdate_astro -- astronomical calendar tables for transdate
+Copyright (c) 2004-2006, Kang Seonghoon aka Tokigun.
+
+This module computes lunisolar calendar outside of the range covered by
+transdate.dat (lunar 1881 to 2050), from astronomical new moons and
+principal solar terms (zhongqi). It is used by transdate when
+transdate.useextendedrange() is called, and normally you don't have to
+use it directly.
+
+The usual rules of Chinese and Korean calendar are used: a month starts at
+the day of new moon, the month containing winter solstice is the 11th
+month, and if there are 13 months between two such months, the first
+month without a principal solar term is the leap month. Days are reckoned
+in UTC+9 (with historical offsets before 1912). New moons are computed by
+the method of J. Meeus, Astronomical Algorithms (ch. 49), and solar
+longitude by its low accuracy formula (ch. 25), so the result can be
+wrong by a day when new moon or solar term is very close to midnight.
+Also historical calendars before 1896 were not computed this way, so
+consider the result as proleptic one.
+
+Tables are computed a century at a time, and saved to the cache directory
+in the format of transdate.dat, so later processes can load them instead.
+"""
+
+__all__ = ['MINYEAR', 'MAXYEAR', 'setcachedir', 'gettables', 'ord2lun', 'lun2ord']
+
+import os
+from math import sin, floor, pi
+from bisect import bisect_right
+from array import array
+try: from thread import allocate_lock
+except ImportError: from dummy_thread import allocate_lock
+
+import transdate, transdate_tables
+
+MINYEAR = 1000
+MAXYEAR = 2999
+VERSION = 1 # increased whenever computed result can change
+TIMEZONE = 9 # hours from UTC, after 1911
+
+_CACHEDIR = None
+_TABLES = {}
+_LOCK = allocate_lock()
+
+###################################################################################
+## Astronomical Functions
+
+_RAD = pi / 180
+
+def _deltat(jde):
+    # approximate difference between TT and UT in days, from polynomial
+    # expressions of Espenak and Meeus (2006).
+    y = 2000 + (jde - 2451544.5) / 365.2425
+    if y < 1600:
+        u = (y - 1000) / 100
+        dt = 1574.2 + u * (-556.01 + u * (71.23472 + u * (0.319781 + u * (
+             -0.8503463 + u * (-0.005050998 + u * 0.0083572073)))))
+    elif y < 1700:
+        t = y - 1600
+        dt = 120 + t * (-0.9808 + t * (-0.01532 + t / 7129))
+    elif y < 1800:
+        t = y - 1700
+        dt = 8.83 + t * (0.1603 + t * (-0.0059285 + t * (0.00013336 - t / 1174000)))
+    elif y < 1860:
+        t = y - 1800
+        dt = 13.72 + t * (-0.332447 + t * (0.0068612 + t * (0.0041116 + t * (
+             -0.00037436 + t * (0.0000121272 + t * (-0.0000001699 +
+             t * 0.000000000875))))))
+    elif y < 1900:
+        t = y - 1860
+        dt = 7.62 + t * (0.5737 + t * (-0.251754 + t * (0.01680668 + t * (
+             -0.0004473624 + t / 233174))))
+    elif y < 1920:
+        t = y - 1900
+        dt = -2.79 + t * (1.494119 + t * (-0.0598939 + t * (0.0061966 - t * 0.000197)))
+    elif y < 1941:
+        t = y - 1920
+        dt = 21.20 + t * (0.84493 + t * (-0.076100 + t * 0.0020936))
+    elif y < 1961:
+        t = y - 1950
+        dt = 29.07 + t * (0.407 + t * (-1 / 233.0 + t / 2547))
+    elif y < 1986:
+        t = y - 1975
+        dt = 45.45 + t * (1.067 + t * (-1 / 260.0 - t / 718))
+    elif y < 2005:
+        t = y - 2000
+        dt = 63.86 + t * (0.3345 + t * (-0.060374 + t * (0.0017275 + t * (
+             0.000651814 + t * 0.00002373599))))
+    elif y < 2050:
+        t = y - 2000
+        dt = 62.92 + t * (0.32217 + t * 0.005589)
+    elif y < 2150:
+        u = (y - 1820) / 100
+        dt = -20 + 32 * u * u - 0.5628 * (2150 - y)
+    else:
+        u = (y - 1820) / 100
+        dt = -20 + 32 * u * u
+    return dt / 86400
+
+_NEWMOONTERMS = [ # (coefficient, power of E, multipliers of M, M', F, Omega)
+    (-0.40720, 0, 0, 1, 0, 0), (0.17241, 1, 1, 0, 0, 0),
+    (0.01608, 0, 0, 2, 0, 0), (0.01039, 0, 0, 0, 2, 0),
+    (0.00739, 1, -1, 1, 0, 0), (-0.00514, 1, 1, 1, 0, 0),
+    (0.00208, 2, 2, 0, 0, 0), (-0.00111, 0, 0, 1, -2, 0),
+    (-0.00057, 0, 0, 1, 2, 0), (0.00056, 1, 1, 2, 0, 0),
+    (-0.00042, 0, 0, 3, 0, 0), (0.00042, 1, 1, 0, 2, 0),
+    (0.00038, 1, 1, 0, -2, 0), (-0.00024, 1, -1, 2, 0, 0),
+    (-0.00017, 0, 0, 0, 0, 1), (-0.00007, 0, 2, 1, 0, 0),
+    (0.00004, 0, 0, 2, -2, 0), (0.00004, 0, 3, 0, 0, 0),
+    (0.00003, 0, 1, 1, -2, 0), (0.00003, 0, 0, 2, 2, 0),
+    (-0.00003, 0, 1, 1, 2, 0), (0.00003, 0, -1, 1, 2, 0),
+    (-0.00002, 0, -1, 1, -2, 0), (-0.00002, 0, 1, 3, 0, 0),
+    (0.00002, 0, 0, 4, 0, 0),
+]
+
+_PLANETARYTERMS = [ # (coefficient, constant, multiplier of k), except for A1
+    (0.000165, 251.88, 0.016321),
+    (0.000164, 251.83, 26.651886), (0.000126, 349.42, 36.412478),
+    (0.000110, 84.66, 18.206239), (0.000062, 141.74, 53.303771),
+    (0.000060, 207.14, 2.453732), (0.000056, 154.84, 7.306860),
+    (0.000047, 34.52, 27.261239), (0.000042, 207.19, 0.121824),
+    (0.000040, 291.34, 1.844379), (0.000037, 161.72, 24.198154),
+    (0.000035, 239.56, 25.513099), (0.000023, 331.55, 3.592518),
+]
+
+def _newmoon(k):
+    # returns JDE of k-th new moon since 2000-01-06.
+    t = k / 1236.85
+    jde = 2451550.09766 + 29.530588861 * k + t * t * (0.00015437 +
+          t * (-0.000000150 + t * 0.00000000073))
+    e = 1 - t * (0.002516 + t * 0.0000074)
+    args = (None, # placeholder for the power of E
+            (2.5534 + 29.10535670 * k - t * t * (0.0000014 + t * 0.00000011)) * _RAD,
+            (201.5643 + 385.81693528 * k + t * t * (0.0107582 + t * (0.00001238 -
+             t * 0.000000058))) * _RAD,
+            (160.7108 + 390.67050284 * k - t * t * (0.0016118 + t * (0.00000227 -
+             t * 0.000000011))) * _RAD,
+            (124.7746 - 1.56375588 * k + t * t * (0.0020672 + t * 0.00000215)) * _RAD)
+    for coeff, epower, m, mprime, f, omega in _NEWMOONTERMS:
+        jde += coeff * e ** epower * sin(m * args[1] + mprime * args[2] +
+                                         f * args[3] + omega * args[4])
+    jde += 0.000325 * sin((299.77 + 0.107408 * k - 0.009173 * t * t) * _RAD)
+    for coeff, const, mult in _PLANETARYTERMS:
+        jde += coeff * sin((const + mult * k) * _RAD)
+    return jde
+
+def _sunlongitude(jde):
+    # returns apparent longitude of the sun in degrees.
+    t = (jde - 2451545) / 36525
+    l0 = 280.46646 + t * (36000.76983 + t * 0.0003032)
+    m = (357.52911 + t * (35999.05029 - t * 0.0001537)) * _RAD
+    c = (1.914602 - t * (0.004817 + t * 0.000014)) * sin(m) + \
+        (0.019993 - t * 0.000101) * sin(2 * m) + 0.000289 * sin(3 * m)
+    omega = (125.04 - 1934.136 * t) * _RAD
+    return (l0 + c - 0.00569 - 0.00478 * sin(omega)) % 360
+
+def _solarterm(longitude, jde):
+    # returns JDE when the sun reaches given longitude, near given JDE.
+    for i in xrange(20):
+        delta = (longitude - _sunlongitude(jde) + 180) % 360 - 180
+        jde += delta * 365.2422 / 360
+        if abs(delta) < 1e-7: break
+    return jde
+
+def _timezone(jde):
+    # returns offset from UTC in days. calendars before 1912 were based on
+    # the local time of Beijing (116.4 deg E).
+    if jde < 2419402.5: return 7.76 / 24
+    return TIMEZONE / 24.0
+
+def _localday(jde):
+    # returns Gregorian ordinal of local date at given JDE.
+    return int(floor(jde - _deltat(jde) + 0.5 + _timezone(jde))) - 1721425
+
+###################################################################################
+## Calendar Computation
+
+def _suimonths(year):
+    # returns list of (start ordinal, month, leap) of months between winter
+    # solstices of previous year and given year, i.e. from the 11th month of
+    # previous year to the month before the 11th month of given year.
+    def month11(year):
+        solstice = _localday(_solarterm(270, 2451544.5 + (year - 1999) * 365.2425 - 10))
+        k = int(round((solstice - 730125) / 29.530588861))
+        while _localday(_newmoon(k)) > solstice: k -= 1
+        while _localday(_newmoon(k + 1)) <= solstice: k += 1
+        return k
+    first, last = month11(year - 1), month11(year)
+    starts = [_localday(_newmoon(k)) for k in xrange(first, last + 1)]
+    leap = len(starts) == 14
+    if leap:
+        # principal terms from winter solstice of previous year; the first
+        # month which doesn't have any of them is a leap month.
+        base = 2451544.5 + (year - 2000) * 365.2425 - 10
+        terms = [_localday(_solarterm((270 + 30 * i) % 360, base + 30.44 * i))
+                 for i in xrange(13)]
+    result = []
+    month = 11
+    for i in xrange(len(starts) - 1):
+        isleap = False
+        if leap and i > 0:
+            for term in terms:
+                if starts[i] <= term < starts[i + 1]: break
+            else:
+                isleap = True
+                leap = False
+        if i > 0 and not isleap: month = month % 12 + 1
+        result.append((starts[i], month, isleap))
+    return result
+
+def _computetables(firstyear, lastyear, firstday=None, endday=None):
+    # returns calendar tables for lunar years firstyear..lastyear. if
+    # firstday or endday is given, the first day of firstyear or the day
+    # after lastyear is forced to it (used at the border of transdate.dat).
+    months = []
+    for year in xrange(firstyear, lastyear + 2):
+        months.extend(_suimonths(year))
+    # the first 1st month is the start of firstyear.
+    while months[0][1:] != (1, False): del months[0]
+    monthtable = array('H')
+    yeartable = array('H')
+    leaptable = array('H')
+    start = months[0][0]
+    if firstday is not None: start = firstday
+    for day, month, leap in months:
+        if month == 1 and not leap:
+            if len(yeartable) > lastyear - firstyear: break
+            yeartable.append(len(monthtable))
+            leaptable.append(0)
+        if leap: leaptable[-1] = month
+        monthtable.append(max(day - start, 0))
+    else:
+        raise AssertionError, "new year of %d is not found" % (lastyear + 1)
+    monthtable.append((endday or day) - start)
+    return (firstyear, start, monthtable, yeartable, leaptable)
+
+###################################################################################
+## Cache Management
+
+def setcachedir(path):
+    """setcachedir(path)
+    Sets directory where computed tables are saved. If path is None, the
+    cache is not used."""
+    global _CACHEDIR
+    _CACHEDIR = path
+
+def _cachepath(century):
+    cachedir = _CACHEDIR
+    if cachedir is None:
+        cachedir = os.environ.get('TRANSDATE_CACHE') or \
+                   os.path.join(os.path.expanduser('~'), '.transdate')
+    return os.path.join(cachedir, 'lunar%04d-v%d.dat' % (century * 100, VERSION))
+
+def _savetables(path, tables):
+    data = transdate_tables.dumptables(*tables)
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory): os.makedirs(directory)
+    # written to temporary file first, since other processes can read it.
+    temppath = '%s.%d.tmp' % (path, os.getpid())
+    f = open(temppath, 'wb')
+    try: f.write(data)
+    finally: f.close()
+    os.rename(temppath, path)
+
+def gettables(century):
+    """gettables(century) -> (baseyear, firstday, monthtable, yeartable, leaptable)
+    Returns calendar tables of lunar years in given century (e.g. 18 for
+    1800 to 1899) which are not in transdate.dat, computing them if needed.
+    firstday is Gregorian ordinal of the first day, and the other tables
+    are same as ones of transdate. Returns None if the century is covered by
+    transdate.dat entirely."""
+    try:
+        return _TABLES[century]
+    except KeyError:
+        pass
+    if not MINYEAR <= century * 100 <= MAXYEAR:
+        raise ValueError, "year is out of range"
+    _LOCK.acquire()
+    try:
+        if century in _TABLES: return _TABLES[century]
+        firstyear, lastyear = century * 100, century * 100 + 99
+        tablefirst = transdate._BASEYEAR
+        tablelast = tablefirst + len(transdate._YEARTABLE) - 1
+        firstday = endday = None
+        if firstyear < tablefirst <= lastyear:
+            lastyear = tablefirst - 1
+            endday = transdate._MINDATE
+        if firstyear <= tablelast < lastyear:
+            firstyear = tablelast + 1
+            firstday = transdate._MAXDATE + 1
+        if tablefirst <= firstyear and lastyear <= tablelast:
+            tables = None
+        else:
+            path = _cachepath(century)
+            try:
+                tables = transdate_tables.loadtables(path)
+            except (IOError, ImportError):
+                tables = _computetables(firstyear, lastyear, firstday, endday)
+                try: _savetables(path, tables)
+                except (IOError, OSError): pass # cache is optional
+        _TABLES[century] = tables
+        return tables
+    finally:
+        _LOCK.release()
+
+###################################################################################
+## Conversion
+
+def ord2lun(days):
+    """ord2lun(days) -> (year, month, day, leap)
+    Returns lunar date of given Gregorian ordinal."""
+    year = transdate.date.fromordinal(days).year
+    tables = gettables(year // 100)
+    if tables is None or days < tables[1]:
+        tables = gettables((year - 1) // 100)
+    if tables is None:
+        raise ValueError, "year is out of range"
+    baseyear, firstday, monthtable, yeartable, leaptable = tables
+    days -= firstday
+    months = bisect_right(monthtable, days) - 1
+    if not 0 <= months < len(monthtable) - 1:
+        raise ValueError, "year is out of range"
+    year = bisect_right(yeartable, months) - 1
+    month = months - yeartable[year] + 1
+    leap = False
+    if (leaptable[year] or 13) < month:
+        month -= 1
+        leap = (leaptable[year] == month)
+    return (baseyear + year, month, days - monthtable[months] + 1, leap)
+
+def lun2ord(year, month, day, leap=False):
+    """lun2ord(year, month, day, leap=False) -> Gregorian ordinal
+    Returns Gregorian ordinal of given lunar date."""
+    if not MINYEAR <= year <= MAXYEAR:
+        raise ValueError, "year is out of range"
+    tables = gettables(year // 100)
+    if tables is None:
+        raise ValueError, "year is out of range"
+    baseyear, firstday, monthtable, yeartable, leaptable = tables
+    year -= baseyear
+    if not 0 <= year < len(yeartable):
+        raise ValueError, "year is out of range"
+    if not 1 <= month <= 12:
+        raise ValueError, "wrong month"
+    if leap and leaptable[year] != month:
+        raise ValueError, "wrong leap month"
+    months = yeartable[year] + month - 1
+    if leap or (leaptable[year] or 13) < month:
+        months += 1
+    days = monthtable[months] + day - 1
+    if day < 1 or days >= monthtable[months + 1]:
+        raise ValueError, "wrong day"
+    return days + firstday
@@ -0,0 +1,279 @@
+"""transdate_server -- HTTP/JSON interface of transdate
+Copyright (c) 2004-2006, Kang Seonghoon aka Tokigun.
+
+This module runs a small HTTP server which converts dates for programs not
+written in Python. Start it with "python transdate.py serve", or call
+serve function. Every response is a JSON object, and errors have "error"
+key with HTTP status 400 (wrong request), 404, 413 (too many dates) or 503
+(too many requests in flight).
+
+GET endpoints take query parameters:
+  /sol2lun?date=2006-06-25
+  /lun2sol?date=2006-05-30&leap=0
+  /ganzi?date=2006-06-25&locale=ko
+  /strftime?date=2006-06-25&format=%25LY-%25Lm-%25Ld
+  /stats
+and return {"solar": "2006-06-25", "lunar": "2006-05-30", "leap": false},
+with "ganzi" (indices), "ganzistr" and "text" keys for /ganzi and
+/strftime respectively. /stats returns counters of requests, converted
+dates and latencies, and statistics of conversion cache.
+
+POST /batch takes a JSON object with "op" (one of above endpoints), "dates"
+(list of date strings or [year, month, day, leap] lists), and optional
+"leap", "locale" and "format" like GET parameters. It returns "results",
+a list of the objects above (null for wrong dates), and "errors", a list
+of {"index": ..., "error": ...} objects.
+"""
+
+__all__ = ['serve', 'makeserver']
+
+import sys, time
+try: import json
+except ImportError: import simplejson as json
+from threading import Lock, BoundedSemaphore
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlparse, parse_qs
+
+import transdate
+
+MAXBATCH = 100000 # maximum number of dates in a batch request
+MAXBODY = 16 << 20 # maximum size of request body
+
+###################################################################################
+## Conversion
+
+def _parseleap(value):
+    # returns leap month flag of "leap" parameter or list item; strings are
+    # true unless "0", "" or "false".
+    if isinstance(value, basestring): return value not in ('0', '', 'false')
+    return bool(value)
+
+def _parsedate(item, leap=False):
+    # returns (year, month, day, leap) from "YYYY-MM-DD" string or list.
+    if isinstance(item, basestring):
+        fields = item.split('-')
+        if len(fields) != 3: raise ValueError, "wrong date: %r" % item
+        return (int(fields[0]), int(fields[1]), int(fields[2]), leap)
+    if isinstance(item, list) and len(item) in (3, 4):
+        if len(item) == 4: leap = _parseleap(item[3])
+        return tuple(map(int, item[:3])) + (leap,)
+    raise ValueError, "wrong date: %r" % (item,)
+
+def _result(obj):
+    return {'solar': obj.isoformat(),
+            'lunar': '%04d-%02d-%02d' % (obj.lunaryear, obj.lunarmonth, obj.lunarday),
+            'leap': obj.lunarleap}
+
+def _sol2lun(item, options):
+    year, month, day, leap = _parsedate(item)
+    return transdate.lunardate.fromsolardate(transdate.date(year, month, day))
+
+def _lun2sol(item, options):
+    return transdate.lunardate(*_parsedate(item, options.get('leap', False)))
+
+def _ganzi(item, options):
+    obj = _sol2lun(item, options)
+    result = _result(obj)
+    result['ganzi'] = obj.getganzi()
+    result['ganzistr'] = obj.getganzistr(options.get('locale'))
+    return result
+
+def _strftime(item, options):
+    obj = _sol2lun(item, options)
+    result = _result(obj)
+    result['text'] = obj.strftime(options.get('format', '%Y-%m-%d'))
+    return result
+
+# each function returns lunardate object or result object of given item.
+_OPERATIONS = {'sol2lun': _sol2lun, 'lun2sol': _lun2sol,
+               'ganzi': _ganzi, 'strftime': _strftime}
+
+def _checkoptions(options):
+    # raises ValueError for options which would fail for every date, and
+    # normalizes leap option to bool.
+    options['leap'] = _parseleap(options.get('leap', False))
+    format = options.get('format')
+    if format is not None and not isinstance(format, basestring):
+        raise ValueError, "format should be a string: %r" % (format,)
+    locale = options.get('locale')
+    if locale and not (isinstance(locale, basestring) and
+                       locale in transdate._GANZIMAP):
+        raise ValueError, "unknown locale: %r" % (locale,)
+
+def _convert(op, item, options):
+    result = _OPERATIONS[op](item, options)
+    if isinstance(result, transdate.lunardate): result = _result(result)
+    return result
+
+###################################################################################
+## Statistics
+
+class _counters(object):
+    # thread-safe counters shown by /stats.
+
+    def __init__(self):
+        self.lock = Lock()
+        self.started = time.time()
+        self.requests = {}
+        self.errors = 0
+        self.rejected = 0
+        self.dates = 0
+        self.latency = 0.0
+        self.maxlatency = 0.0
+
+    def add(self, endpoint, dates, latency, error):
+        self.lock.acquire()
+        try:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.dates += dates
+            self.latency += latency
+            self.maxlatency = max(self.maxlatency, latency)
+            if error: self.errors += 1
+        finally:
+            self.lock.release()
+
+    def reject(self):
+        self.lock.acquire()
+        try: self.rejected += 1
+        finally: self.lock.release()
+
+    def snapshot(self):
+        self.lock.acquire()
+        try:
+            uptime = time.time() - self.started
+            total = sum(self.requests.values())
+            return {'uptime': uptime,
+                    'requests': total,
+                    'endpoints': dict(self.requests),
+                    'errors': self.errors,
+                    'rejected': self.rejected,
+                    'dates': self.dates,
+                    'requests_per_second': total / (uptime or 1),
+                    'dates_per_second': self.dates / (uptime or 1),
+                    'average_latency': self.latency / (total or 1),
+                    'max_latency': self.maxlatency,
+                    'cache': transdate.cache_info()}
+        finally:
+            self.lock.release()
+
+###################################################################################
+## Server
+
+class _handler(BaseHTTPRequestHandler):
+    server_version = 'transdate/' + transdate.__version__.split()[0]
+
+    def log_message(self, format, *args):
+        if self.server.verbose: BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def reply(self, status, obj):
+        body = json.dumps(obj)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, method):
+        server = self.server
+        if not server.inflight.acquire(False):
+            server.counters.reject()
+            return self.reply(503, {'error': 'too many requests in flight'})
+        started = time.time()
+        endpoint = urlparse(self.path).path.strip('/')
+        status, dates = 200, 0
+        try:
+            try:
+                status, dates, result = self.dispatch(method, endpoint)
+            except Exception:
+                status, result = 500, {'error': str(sys.exc_info()[1])}
+            self.reply(status, result)
+        finally:
+            server.inflight.release()
+            if endpoint not in _OPERATIONS and endpoint not in ('batch', 'stats'):
+                endpoint = 'other'
+            server.counters.add(endpoint, dates, time.time() - started, status != 200)
+
+    def dispatch(self, method, endpoint):
+        # returns (status, number of converted dates, result object).
+        if method == 'GET':
+            query = dict([(key, values[-1]) for key, values in
+                          parse_qs(urlparse(self.path).query).iteritems()])
+            if endpoint == 'stats':
+                return 200, 0, self.server.counters.snapshot()
+            if endpoint not in _OPERATIONS or 'date' not in query:
+                return 404, 0, {'error': 'unknown endpoint or missing date'}
+            try:
+                _checkoptions(query)
+                return 200, 1, _convert(endpoint, query['date'], query)
+            except (ValueError, TypeError, OverflowError), e:
+                return 400, 0, {'error': str(e)}
+        if endpoint != 'batch':
+            return 404, 0, {'error': 'unknown endpoint'}
+        length = (self.headers.get('Content-Length') or '0').strip()
+        if not length.isdigit():
+            return 400, 0, {'error': 'wrong Content-Length'}
+        length = int(length)
+        if length > MAXBODY:
+            return 413, 0, {'error': 'request is too large'}
+        try:
+            request = json.loads(self.rfile.read(length))
+            op = request['op']
+            dates = request['dates']
+            if op not in _OPERATIONS or not isinstance(dates, list):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return 400, 0, {'error': 'request should be {"op": ..., "dates": [...]}'}
+        if len(dates) > MAXBATCH:
+            return 413, 0, {'error': 'at most %d dates are allowed' % MAXBATCH}
+        try:
+            _checkoptions(request)
+        except ValueError, e:
+            return 400, 0, {'error': str(e)}
+        results = []
+        errors = []
+        for index, item in enumerate(dates):
+            try:
+                results.append(_convert(op, item, request))
+            except (ValueError, TypeError, OverflowError), e:
+                results.append(None)
+                errors.append({'index': index, 'error': str(e)})
+        return 200, len(dates) - len(errors), {'results': results, 'errors': errors}
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+class _server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def makeserver(host='127.0.0.1', port=8000, maxinflight=64, cachesize=65536,
+               verbose=False):
+    """makeserver(host='127.0.0.1', port=8000, maxinflight=64, cachesize=65536,
+                  verbose=False) -> HTTPServer object
+    Returns the server bound to given address, without starting it. At most
+    maxinflight requests are processed at once, and others get HTTP 503.
+    Conversion cache of given size (see transdate.usecache) is enabled and
+    shared by all requests. Requests are logged to stderr if verbose is
+    true."""
+    transdate.usecache(cachesize)
+    server = _server((host, port), _handler)
+    server.inflight = BoundedSemaphore(maxinflight)
+    server.counters = _counters()
+    server.verbose = verbose
+    return server
+
+def serve(host='127.0.0.1', port=8000, maxinflight=64, cachesize=65536,
+          verbose=False):
+    """serve(host='127.0.0.1', port=8000, maxinflight=64, cachesize=65536,
+             verbose=False)
+    Runs the server until interrupted. See makeserver for arguments."""
+    server = makeserver(host, port, maxinflight, cachesize, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
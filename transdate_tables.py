@@ -0,0 +1,60 @@
+"""transdate_tables -- calendar table file format of transdate
+Copyright (c) 2004-2006, Kang Seonghoon aka Tokigun.
+
+This module reads and writes calendar table files (transdate.dat and the
+cache of transdate_astro), and is shared by transdate, transdate_nounicode,
+transdate_astro and gentables.py. See gentables.py for the format.
+"""
+
+__all__ = ['MAGIC', 'VERSION', 'HEADER', 'TABLEPATH', 'loadtables', 'dumptables']
+
+import sys
+
+MAGIC = 'TDAT'
+VERSION = 1
+HEADER = '<4sHHIHHI'
+
+# transdate.dat is in the same directory. (os.path is avoided since importing
+# os module is slow without site module.)
+TABLEPATH = __file__[:len(__file__) - len(__file__.replace('\\', '/').split('/')[-1])] + \
+            'transdate.dat'
+
+def loadtables(path=TABLEPATH):
+    """loadtables(path=TABLEPATH) -> (baseyear, firstday, monthtable, yeartable, leaptable)
+    Loads calendar tables from given file. baseyear is the first lunar year,
+    firstday is Gregorian ordinal of its first day, and the others are
+    arrays of uint16. Raises ImportError if the file is not a calendar table
+    or corrupted."""
+    import struct, binascii
+    from array import array
+    f = open(path, 'rb')
+    try: data = f.read()
+    finally: f.close()
+    size = struct.calcsize(HEADER)
+    if len(data) < size:
+        raise ImportError, "unsupported calendar table: %s" % path
+    magic, version, baseyear, firstday, nyears, nmonths, checksum = \
+        struct.unpack(HEADER, data[:size])
+    if magic != MAGIC or version != VERSION:
+        raise ImportError, "unsupported calendar table: %s" % path
+    data = data[size:]
+    if len(data) != 2 * (nmonths + 1 + 2 * nyears) or \
+       binascii.crc32(data) & 0xffffffff != checksum:
+        raise ImportError, "corrupted calendar table: %s" % path
+    table = array('H', data)
+    if sys.byteorder == 'big': table.byteswap()
+    years = nmonths + 1 + nyears
+    return (baseyear, firstday, table[:nmonths + 1], table[nmonths + 1:years],
+            table[years:])
+
+def dumptables(baseyear, firstday, monthtable, yeartable, leaptable):
+    """dumptables(baseyear, firstday, monthtable, yeartable, leaptable) -> string
+    Returns contents of calendar table file. Arguments are same as the
+    result of loadtables, and tables can be any sequence of integers."""
+    import struct, binascii
+    from array import array
+    data = array('H', list(monthtable) + list(yeartable) + list(leaptable))
+    if sys.byteorder == 'big': data.byteswap()
+    data = data.tostring()
+    return struct.pack(HEADER, MAGIC, VERSION, baseyear, firstday, len(yeartable),
+                       len(monthtable) - 1, binascii.crc32(data) & 0xffffffff) + data